@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Reproducible benchmark suite for the FastCopyWorker engine.
+#
+# Builds seeded synthetic trees in a temp dir, copies each through a matrix of
+# engine settings and appends one JSON line per case to --out, tagged with the
+# engine version, so runs of different versions can be compared with --compare.
+#
+#   python folder_copier_bench.py                                  # full default matrix
+#   python folder_copier_bench.py --scenarios tiny --modes processes --batch-files 1 64
+#   python folder_copier_bench.py --scale 0.1 --workers 4 16 --compare
+#   python folder_copier_bench.py --speed accurate --schedules walk largest
+#
+# Scenarios: tiny (many tiny files), huge (a few huge files),
+#            web (mixed web-project shape, deep nesting), symlinks (symlink-heavy).
+# Numbers are warm-cache: the source is read once while the tree is generated.
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+
+from folder_copier_engine import FastCopyWorker, AUTOTUNE_MAX_WORKERS, MODES, SCHEDULES
+
+ENGINE_FILE = Path(__file__).with_name("folder_copier_engine.py")
+DEFAULT_OUT = Path(__file__).with_name("folder_copier_bench.jsonl")
+SEED = 1234
+
+
+class QuietUI:
+    """Headless stand-in for TkUI: swallows progress, keeps the last status."""
+
+    def __init__(self):
+        self.success = None
+        self.errors = []
+
+    def log(self, text: str):
+        if text.startswith("שגיאה"):
+            self.errors.append(text)
+
+    def fatal(self, msg: str):
+        self.errors.append(msg)
+
+    def total_known(self, total: int):
+        pass
+
+    def plan(self, action: str, path: str):
+        pass
+
+    def progress(self, copied: int, total: int):
+        pass
+
+    def stats(self, snapshot: dict):
+        pass
+
+    def finished(self, success: bool):
+        self.success = success
+
+
+# =========================== SYNTHETIC TREES ===========================
+
+def _write(path: Path, size: int, rng: random.Random, block: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        # Slices at random offsets of one random block: cheap to make, not dedupable
+        while size > 0:
+            start = rng.randrange(0, len(block) // 2)
+            n = min(size, len(block) - start)
+            f.write(block[start:start + n])
+            size -= n
+
+
+def make_tiny(root: Path, scale: float, rng: random.Random, block: bytes):
+    for i in range(int(20000 * scale)):
+        _write(root / f"pkg{i // 200:04d}" / f"mod{i}.js", rng.randint(100, 4096), rng, block)
+
+
+def make_huge(root: Path, scale: float, rng: random.Random, block: bytes):
+    for i in range(3):
+        _write(root / f"disk{i}.img", int(512 * 1024 * 1024 * scale), rng, block)
+
+
+def make_web(root: Path, scale: float, rng: random.Random, block: bytes):
+    areas = ["src/components", "src/pages", "src/lib", "public/assets", "docs", "tests"]
+    for i in range(int(8000 * scale)):
+        parts = [f"d{rng.randint(0, 7)}" for _ in range(rng.randint(0, 6))]
+        area = rng.choice(areas)
+        if area == "public/assets" and rng.random() < 0.3:
+            name, size = f"img{i}.png", int(rng.lognormvariate(12, 1.2))   # ~160K median
+        else:
+            name, size = f"f{i}.jsx", int(rng.lognormvariate(8, 1.0))      # ~3K median
+        _write(root.joinpath(area, *parts, name), min(size, 32 * 1024 * 1024), rng, block)
+
+
+def make_symlinks(root: Path, scale: float, rng: random.Random, block: bytes):
+    targets = []
+    for i in range(int(2000 * scale)):
+        p = root / "real" / f"g{i // 100:03d}" / f"t{i}.dat"
+        _write(p, rng.randint(256, 64 * 1024), rng, block)
+        targets.append(p)
+    for i in range(int(6000 * scale)):
+        link = root / "links" / f"l{i // 200:03d}" / f"s{i}.dat"
+        link.parent.mkdir(parents=True, exist_ok=True)
+        os.symlink(rng.choice(targets), link)
+    for i in range(max(1, int(50 * scale))):
+        os.symlink(root / "real", root / "links" / f"dirlink{i}", target_is_directory=True)
+
+
+SCENARIOS = {
+    "tiny": make_tiny,
+    "huge": make_huge,
+    "web": make_web,
+    "symlinks": make_symlinks,
+}
+
+
+def build_tree(name: str, root: Path, scale: float) -> dict:
+    rng = random.Random(f"{SEED}:{name}")
+    block = random.Random(SEED).randbytes(2 * 1024 * 1024)
+    t0 = time.perf_counter()
+    root.mkdir(parents=True, exist_ok=True)
+    SCENARIOS[name](root, scale, rng, block)
+
+    files = total = 0
+    for dirpath, _, names in os.walk(root):
+        for n in names:
+            files += 1
+            try:
+                total += os.stat(os.path.join(dirpath, n)).st_size
+            except OSError:
+                pass
+    return {"files": files, "bytes": total, "build_s": round(time.perf_counter() - t0, 2)}
+
+
+# =========================== RUNNER ===========================
+
+def engine_version() -> str:
+    digest = hashlib.sha1(ENGINE_FILE.read_bytes()).hexdigest()[:10]
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ENGINE_FILE.parent,
+                             capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        rev = ""
+    return f"{rev}+{digest}" if rev else digest
+
+
+def run_case(src: Path, dst: Path, mode: str, workers, quick: bool, batch_files,
+             schedule: str = "walk") -> float:
+    shutil.rmtree(dst, ignore_errors=True)
+    ui = QuietUI()
+    auto = workers == "auto"
+    worker = FastCopyWorker(src, dst, True, mode, AUTOTUNE_MAX_WORKERS if auto else workers,
+                            quick, ui, batch_files=batch_files, auto_workers=auto,
+                            schedule=schedule)
+    t0 = time.perf_counter()
+    worker.start()
+    elapsed = time.perf_counter() - t0
+    if not ui.success:
+        raise RuntimeError(f"copy failed: {ui.errors[:3]}")
+    return elapsed
+
+
+def load_previous(path: Path, version: str) -> dict:
+    """Latest result per case key from runs of other engine versions."""
+    previous = {}
+    if not path.exists():
+        return previous
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if rec.get("version") != version:
+                previous[rec["key"]] = rec
+    return previous
+
+
+def _workers_arg(value: str):
+    return "auto" if value.lower() == "auto" else int(value)
+
+
+def _batch_arg(value: str):
+    return None if value.lower() == "default" else int(value)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="FastCopyWorker benchmark suite")
+    ap.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    ap.add_argument("--modes", nargs="+", choices=list(MODES),
+                    default=["threads", "processes"])
+    ap.add_argument("--workers", nargs="+", type=_workers_arg, default=[4, 16])
+    ap.add_argument("--speed", nargs="+", choices=["quick", "accurate"], default=["quick", "accurate"])
+    ap.add_argument("--batch-files", nargs="+", type=_batch_arg, default=[None],
+                    help="batch sizes to compare ('default' = engine default)")
+    ap.add_argument("--schedules", nargs="+", choices=list(SCHEDULES), default=["walk"],
+                    help="submission orders to compare ('largest' only differs in accurate mode)")
+    ap.add_argument("--scale", type=float, default=1.0, help="multiplies file counts and sizes")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--tmp", type=Path, default=None,
+                    help="where to build trees (put it on the disk you care about)")
+    ap.add_argument("--out", type=Path, default=DEFAULT_OUT)
+    ap.add_argument("--compare", action="store_true",
+                    help="show the change against the last run of a different engine version")
+    args = ap.parse_args()
+
+    if "symlinks" in args.scenarios and sys.platform == "win32":
+        print("symlinks scenario skipped: needs symlink privileges on Windows")
+        args.scenarios.remove("symlinks")
+
+    version = engine_version()
+    previous = load_previous(args.out, version) if args.compare else {}
+    host = {"platform": platform.platform(), "python": platform.python_version(),
+            "cpus": os.cpu_count()}
+    print(f"engine {version} · {host['platform']} · python {host['python']} · {host['cpus']} CPUs")
+
+    with tempfile.TemporaryDirectory(prefix="fastcopy_bench_", dir=args.tmp) as tmp, \
+            open(args.out, "a", encoding="utf-8") as out:
+        for scenario in args.scenarios:
+            src, dst = Path(tmp) / scenario, Path(tmp) / f"{scenario}_dst"
+            tree = build_tree(scenario, src, args.scale)
+            print(f"\n[{scenario}] {tree['files']} files, {tree['bytes'] / 1e6:.1f} MB "
+                  f"(built in {tree['build_s']}s)")
+
+            for mode in args.modes:
+                for workers in args.workers:
+                    for speed in args.speed:
+                        for batch in args.batch_files:
+                            for schedule in args.schedules:
+                                times = [run_case(src, dst, mode, workers, speed == "quick",
+                                                  batch, schedule)
+                                         for _ in range(args.repeat)]
+                                best = min(times)
+                                key = f"{scenario}|{args.scale}|{mode}|{workers}|{speed}|{batch}"
+                                if schedule != "walk":
+                                    key += f"|{schedule}"
+                                rec = {
+                                    "key": key, "version": version, "ts": round(time.time()),
+                                    **host, "scenario": scenario, "scale": args.scale,
+                                    "mode": mode, "workers": workers, "speed": speed,
+                                    "batch_files": batch, "schedule": schedule,
+                                    "files": tree["files"], "bytes": tree["bytes"],
+                                    "best_s": round(best, 4),
+                                    "median_s": round(statistics.median(times), 4),
+                                    "mb_per_s": round(tree["bytes"] / best / 1e6, 2),
+                                    "files_per_s": round(tree["files"] / best, 1),
+                                }
+                                out.write(json.dumps(rec) + "\n")
+                                out.flush()
+
+                                line = (f"  {mode:>9} w={workers!s:>4} {speed:>8} "
+                                        f"batch={batch or 'default'!s:>7} {schedule:>7}: "
+                                        f"{best:7.2f}s {rec['mb_per_s']:9.1f} MB/s "
+                                        f"{rec['files_per_s']:9.0f} files/s")
+                                prev = previous.get(key)
+                                if prev:
+                                    delta = (prev["best_s"] / best - 1) * 100
+                                    line += f"  {delta:+6.1f}% vs {prev['version']}"
+                                print(line)
+
+            shutil.rmtree(src, ignore_errors=True)
+            shutil.rmtree(dst, ignore_errors=True)
+
+    print(f"\nresults appended to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Headless front-end for the FastCopyWorker engine (cron, containers, benchmarks).
+# Emits one JSON object per line on stdout:
+#   {"event": "log" | "progress" | "stats" | "plan" | "fatal" | "finished", ...}
+#
+#   python folder_copier_cli.py SRC DST --mode processes --workers auto --sync
+#
+# Exit codes: 0 success, 1 finished with errors, 2 bad arguments / fatal, 130 cancelled.
+
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import multiprocessing
+from pathlib import Path
+
+from folder_copier_engine import (
+    FastCopyWorker, MODES, AUTOTUNE_MAX_WORKERS, LARGE_FILE_THRESHOLD, LARGE_CHUNK_SIZE,
+    BATCH_MAX_BYTES, DISCOVERY_WALKERS, DEDUP_MODES, VERIFY_MODES, SCHEDULES,
+    METADATA_POLICIES,
+)
+
+EXIT_OK = 0
+EXIT_ERRORS = 1
+EXIT_FATAL = 2
+EXIT_CANCELLED = 130
+
+
+class JsonLinesUI:
+    """Worker callbacks → JSON lines. Progress is throttled to one line per interval."""
+
+    def __init__(self, stream=sys.stdout, progress_interval: float = 1.0, quiet: bool = False):
+        self.stream = stream
+        self.progress_interval = progress_interval
+        self.quiet = quiet
+        self.success = None
+        self.fatal_error = None
+        self._last_progress = 0.0
+        self._lock = threading.Lock()
+
+    def _emit(self, event: str, **data):
+        line = json.dumps({"event": event, "ts": round(time.time(), 3), **data},
+                          ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def log(self, text: str):
+        if not self.quiet:
+            self._emit("log", msg=text)
+
+    def fatal(self, msg: str):
+        self.fatal_error = msg
+        self._emit("fatal", msg=msg)
+
+    def total_known(self, total: int):
+        self._emit("total", total=total)
+
+    def plan(self, action: str, path: str):
+        # The result of --dry-run: never silenced by --quiet
+        self._emit("plan", action=action, path=path)
+
+    def progress(self, copied: int, total: int):
+        now = time.monotonic()
+        if now - self._last_progress >= self.progress_interval:
+            self._last_progress = now
+            self._emit("progress", copied=copied, total=total)
+
+    def stats(self, snapshot: dict):
+        if not self.quiet:
+            self._emit("stats", **{k: (round(v, 3) if isinstance(v, float) else v)
+                                   for k, v in snapshot.items()})
+
+    def finished(self, success: bool):
+        self.success = success
+        self._emit("finished", success=success)
+
+
+def _workers_arg(value: str):
+    if value.lower() == "auto":
+        return "auto"
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError("workers must be >= 1 or 'auto'")
+    return n
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="Fast folder copier (headless)")
+    ap.add_argument("src", type=Path)
+    ap.add_argument("dst", type=Path)
+    ap.add_argument("--mode", choices=MODES, default="threads")
+    ap.add_argument("--workers", type=_workers_arg, default=8,
+                    help="number of workers or 'auto'")
+    speed = ap.add_mutually_exclusive_group()
+    speed.add_argument("--quick", dest="quick", action="store_true", default=True,
+                       help="start copying without a running total (default)")
+    speed.add_argument("--accurate", dest="quick", action="store_false",
+                       help="report a running total while discovering")
+    ap.add_argument("--schedule", choices=SCHEDULES, default="walk",
+                    help="submission order; 'largest' (LPT) applies with --accurate")
+    ap.add_argument("--overwrite", action="store_true")
+    ap.add_argument("--sync", action="store_true", help="copy only new or changed files")
+    ap.add_argument("--hash", dest="check_hash", action="store_true",
+                    help="with --sync, compare content when only the mtime differs")
+    ap.add_argument("--mirror", action="store_true",
+                    help="make DST an exact copy of SRC, deleting files SRC doesn't have")
+    ap.add_argument("--dry-run", action="store_true",
+                    help="with --mirror, only list the copy (+), update (~) and delete (-) actions")
+    ap.add_argument("--metadata", choices=METADATA_POLICIES, default="full",
+                    help="data = contents only, times = + timestamps, "
+                         "full = + permissions and xattrs (directories included)")
+    ap.add_argument("--resume", action="store_true", help="journal this run so it can be resumed, "
+                         "skipping work an earlier --resume run recorded")
+    ap.add_argument("--dedup", choices=DEDUP_MODES, default="off",
+                    help="link identical files at the destination (auto = reflink, then hardlink)")
+    ap.add_argument("--verify", choices=VERIFY_MODES, default="off",
+                    help="hash while copying and re-read the destination "
+                         "(direct = O_DIRECT read-back, bypassing the page cache)")
+    ap.add_argument("--window", type=int, default=0, help="max in-flight jobs (0 = auto)")
+    ap.add_argument("--walkers", type=int, default=DISCOVERY_WALKERS)
+    ap.add_argument("--large-threshold", type=int, default=LARGE_FILE_THRESHOLD)
+    ap.add_argument("--chunk-size", type=int, default=LARGE_CHUNK_SIZE)
+    ap.add_argument("--batch-files", type=int, default=None)
+    ap.add_argument("--batch-bytes", type=int, default=BATCH_MAX_BYTES)
+    ap.add_argument("--report", type=Path, default=None, help="JSON run report path")
+    ap.add_argument("--progress-interval", type=float, default=1.0)
+    ap.add_argument("--quiet", action="store_true",
+                    help="only progress, plan, fatal and finished events")
+    return ap
+
+
+def make_worker(args, ui) -> FastCopyWorker:
+    auto = args.workers == "auto"
+    return FastCopyWorker(
+        args.src, args.dst, args.overwrite, args.mode,
+        AUTOTUNE_MAX_WORKERS if auto else args.workers, args.quick, ui,
+        sync=args.sync, check_hash=args.check_hash,
+        large_threshold=args.large_threshold, chunk_size=args.chunk_size,
+        batch_files=args.batch_files, batch_bytes=args.batch_bytes,
+        window=args.window, walkers=args.walkers, resume=args.resume,
+        report_path=args.report, auto_workers=auto, dedup=args.dedup,
+        verify=args.verify, schedule=args.schedule,
+        mirror=args.mirror, dry_run=args.dry_run, metadata=args.metadata,
+    )
+
+
+def main(argv=None) -> int:
+    multiprocessing.freeze_support()
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.dry_run and not args.mirror:
+        parser.error("--dry-run requires --mirror")
+    ui = JsonLinesUI(progress_interval=args.progress_interval, quiet=args.quiet)
+    worker = make_worker(args, ui)
+
+    def on_signal(signum, frame):
+        worker.cancel()
+
+    signal.signal(signal.SIGINT, on_signal)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, on_signal)
+
+    worker.start()
+
+    if worker.cancelled:
+        return EXIT_CANCELLED
+    if ui.fatal_error is not None:
+        return EXIT_FATAL
+    return EXIT_OK if ui.success else EXIT_ERRORS
+
+
+if __name__ == "__main__":
+    sys.exit(main())
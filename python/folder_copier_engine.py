@@ -0,0 +1,2534 @@
+# -*- coding: utf-8 -*-
+
+# FastCopyWorker engine, shared by folder_copier_gui.py (Tk) and
+# folder_copier_cli.py (headless). Must not import tkinter.
+
+import os
+import sys
+import json
+import time
+import errno
+import mmap
+import queue
+import shutil
+import signal
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+from array import array
+from collections import deque, Counter
+from datetime import datetime
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Optional, Tuple, Iterable, List, Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+EXCLUDED_DIR_NAME = "node_modules"
+
+MODES = ("threads", "processes", "sharded")
+
+# Copier bookkeeping lives here, inside the destination
+STATE_DIR_NAME = ".fastcopy"
+MANIFEST_NAME = "manifest.json"
+JOURNAL_NAME = "journal.log"
+CHECKSUMS_NAME = "checksums.json"
+
+# Journal records are fsynced together, at most this many seconds apart
+JOURNAL_FSYNC_INTERVAL = 2.0
+
+# FAT/exFAT keep mtimes at 2s resolution
+MTIME_TOLERANCE_NS = 2_000_000_000
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Files at least this big are split into byte ranges copied by several workers
+LARGE_FILE_THRESHOLD = 256 * 1024 * 1024
+LARGE_CHUNK_SIZE = 64 * 1024 * 1024
+# Large files are assembled under this name and renamed into place when complete,
+# so a cancelled or crashed copy never looks like a finished one
+PART_SUFFIX = ".fastcopy-part"
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Small files travel to the pool in batches: one submit/result per batch
+SMALL_FILE_THRESHOLD = 1024 * 1024
+BATCH_MAX_FILES = 64
+BATCH_MAX_BYTES = 8 * 1024 * 1024
+
+# At most workers * WINDOW_PER_WORKER futures are outstanding at any time
+WINDOW_PER_WORKER = 4
+
+# Mirror dry run: each planned action goes to ui.plan(action, path)
+PLAN_MARKS = {"copy": "+", "update": "~", "delete": "-", "replace": "!", "rename": ">"}
+
+# sharded mode: each process walks and copies whole subtrees. The tree is split
+# until there are SHARDS_PER_WORKER shards per worker (or nothing left to split);
+# a shard's size is estimated from at most SHARD_PROBE_DIRS scanned directories
+SHARDS_PER_WORKER = 4
+SHARD_PROBE_DIRS = 64
+SHARD_MAX_ERRORS = 100
+
+# Metadata policy: "data" = contents only, "times" = + atime/mtime,
+# "full" = + permission bits, flags and xattrs (shutil.copystat). File metadata
+# is applied by the pool in batches of META_BATCH_FILES after the data is in;
+# directories get theirs in one bottom-up pass at the end
+METADATA_POLICIES = ("data", "times", "full")
+META_BATCH_FILES = 256
+
+# Dedup: files from this size up (and below the large-file lane) are hashed,
+# and byte-identical ones become reflinks/hardlinks of the first copy
+DEDUP_MIN_SIZE = 4096
+DEDUP_MODES = ("off", "auto", "reflink", "hardlink")
+FICLONE = 0x40049409  # linux/fs.h: _IOW(0x94, 9, int)
+
+# Verify: hash while copying, then re-read the destination ("direct" = O_DIRECT,
+# past the page cache, where the filesystem allows it)
+VERIFY_MODES = ("off", "readback", "direct")
+DIRECT_ALIGN = 4096
+
+# Cancel: workers check between slices of at most CANCEL_SLICE bytes; running
+# jobs get CANCEL_GRACE seconds before process workers are terminated
+CANCEL_SLICE = 8 * 1024 * 1024
+CANCEL_GRACE = 2.0
+CANCEL_POLL_INTERVAL = 0.1
+
+# Submission order: "walk" = as discovered, "largest" = largest files first
+# (LPT); "largest" needs the whole job list, so it applies to accurate mode
+SCHEDULES = ("walk", "largest")
+
+# Auto workers: hill-climb the active worker count on measured throughput
+AUTOTUNE_MAX_WORKERS = 64
+AUTOTUNE_START = 2
+AUTOTUNE_INTERVAL = 1.0
+AUTOTUNE_SAMPLES = 3
+AUTOTUNE_TOLERANCE = 0.05
+AUTOTUNE_REPROBE = 5
+# A file's fixed cost (open/create/close/metadata) expressed in bytes
+AUTOTUNE_FILE_COST = 64 * 1024
+# ProcessPoolExecutor refuses more than this on Windows
+WINDOWS_MAX_PROCESSES = 61
+
+# Discovery: scandir walker threads feeding per-directory batches to the copier
+DISCOVERY_WALKERS = 4
+DISCOVERY_QUEUE_SIZE = 256
+DISCOVERY_BATCH = 512
+
+# Log lines kept between two UIEventChannel drains
+LOG_RING_SIZE = 500
+
+# Live throughput/ETA snapshots are pushed to the UI at most this often
+STATS_INTERVAL = 0.5
+SIZE_BUCKETS = [(4 * 1024, "<4K"), (64 * 1024, "<64K"), (1024 * 1024, "<1M"),
+                (16 * 1024 * 1024, "<16M"), (256 * 1024 * 1024, "<256M")]
+LATENCY_BUCKETS_MS = [1, 4, 16, 64, 256, 1024, 4096]
+
+# errnos meaning "this kernel/filesystem can't do it, use the next method"
+_KERNEL_COPY_FALLBACK = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
+# =========================== COPY JOB ===========================
+
+# Set once per pool worker by _init_pool_worker; shared with the parent's cancel()
+_cancel_event = None
+
+
+class CopyCancelled(OSError):
+    def __init__(self):
+        super().__init__(errno.ECANCELED, "cancelled")
+
+
+def _init_pool_worker(event):
+    global _cancel_event
+    _cancel_event = event
+
+
+def _init_process_worker(event):
+    # Ctrl-C goes to the whole process group; the parent cancels via the event
+    # and would otherwise get KeyboardInterrupt tracebacks from every child.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _init_pool_worker(event)
+
+
+def _check_cancel():
+    if _cancel_event is not None and _cancel_event.is_set():
+        raise CopyCancelled()
+
+
+@dataclass(slots=True)
+class CopyJob:
+    src: str
+    dst: str
+    overwrite: bool
+    size: int = -1
+    sync: bool = False
+    check_hash: bool = False
+    # (size, mtime_ns, digest) recorded by the previous sync run
+    known: Optional[Tuple[int, int, Optional[str]]] = None
+    verify: str = "off"
+    # Metadata the worker applies itself; "data" when the parent defers it
+    meta: str = "full"
+
+
+@dataclass(slots=True)
+class CopyResult:
+    ok: bool
+    src: str
+    dst: str
+    error: Optional[str] = None
+    skipped: bool = False
+    size: int = 0
+    mtime_ns: int = 0
+    digest: Optional[str] = None
+    errno: Optional[int] = None
+    worker: str = ""
+    elapsed: float = 0.0
+    # "reflink" / "hardlink" when the file was deduplicated instead of copied
+    linked: Optional[str] = None
+    # True/False when the destination was read back and compared
+    verified: Optional[bool] = None
+
+
+@dataclass(slots=True)
+class RangeJob:
+    src: str
+    dst: str
+    offset: int
+    length: int
+    verify: str = "off"
+
+
+@dataclass(slots=True)
+class RangeResult:
+    ok: bool
+    dst: str
+    offset: int
+    length: int
+    error: Optional[str] = None
+    errno: Optional[int] = None
+    worker: str = ""
+    elapsed: float = 0.0
+    digest: Optional[str] = None
+    verified: Optional[bool] = None
+
+
+@dataclass
+class DeleteJob:
+    path: str
+    is_dir: bool
+
+
+@dataclass
+class DeleteResult:
+    ok: bool
+    path: str
+    is_dir: bool
+    error: Optional[str] = None
+    errno: Optional[int] = None
+    worker: str = ""
+    elapsed: float = 0.0
+
+
+@dataclass
+class LinkJob:
+    job: CopyJob
+    target: str
+    method: str
+    digest: Optional[str] = None
+
+
+@dataclass
+class HashResult:
+    ok: bool
+    job: CopyJob
+    digest: Optional[str] = None
+    error: Optional[str] = None
+    errno: Optional[int] = None
+    worker: str = ""
+    elapsed: float = 0.0
+
+
+def _worker_id() -> str:
+    return f"{os.getpid()}/{threading.current_thread().name}"
+
+
+def _timed(fn, job):
+    t0 = time.perf_counter()
+    res = fn(job)
+    res.elapsed = time.perf_counter() - t0
+    res.worker = _worker_id()
+    return res
+
+
+def file_digest(path) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _sync_check(job: CopyJob, src_st: os.stat_result, dst_path: Path,
+                allow_hash: bool = True) -> Tuple[bool, Optional[str]]:
+    """Return (unchanged, digest) for a sync job without copying anything."""
+    size, mtime_ns = src_st.st_size, src_st.st_mtime_ns
+
+    # Manifest hit: the destination was written from exactly this source version
+    if job.known is not None and job.known[0] == size and job.known[1] == mtime_ns:
+        return True, job.known[2]
+
+    try:
+        dst_st = dst_path.stat()
+    except FileNotFoundError:
+        return False, None
+
+    if dst_st.st_size != size:
+        return False, None
+    if abs(dst_st.st_mtime_ns - mtime_ns) <= MTIME_TOLERANCE_NS:
+        return True, None
+    if not (job.check_hash and allow_hash):
+        return False, None
+
+    # Same size, different mtime: let the content decide
+    src_digest = file_digest(job.src)
+    ref_digest = job.known[2] if job.known and job.known[0] == size and job.known[2] else None
+    if ref_digest is None:
+        ref_digest = file_digest(dst_path)
+    if src_digest != ref_digest:
+        return False, src_digest
+
+    if dst_st.st_nlink == 1:
+        # Not on a dedup hardlink: that would restamp every duplicate sharing the inode
+        os.utime(dst_path, ns=(src_st.st_atime_ns, mtime_ns))
+    return True, src_digest
+
+
+def apply_metadata(src, dst, policy: str):
+    if policy == "times":
+        st = os.stat(src)
+        os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+    elif policy == "full":
+        shutil.copystat(src, dst)
+
+
+def _unshare(dst):
+    # A dedup hardlink shares its inode with other destination files;
+    # writing through it in place would rewrite all of them
+    try:
+        if os.lstat(dst).st_nlink > 1:
+            os.remove(dst)
+    except FileNotFoundError:
+        pass
+
+
+def _copy_data(src, dst, policy: str):
+    _unshare(dst)
+    shutil.copyfile(src, dst)
+    apply_metadata(src, dst, policy)
+
+
+def copy_file_job(job: CopyJob) -> CopyResult:
+    return _timed(_copy_file, job)
+
+
+def _copy_file(job: CopyJob) -> CopyResult:
+    if job.verify != "off":
+        return _copy_hashed(job)
+    try:
+        _check_cancel()
+        src_path = Path(job.src)
+        dst_path = Path(job.dst)
+
+        if job.sync:
+            st = src_path.stat()
+            unchanged, digest = _sync_check(job, st, dst_path)
+            if unchanged:
+                return CopyResult(True, job.src, job.dst, skipped=True,
+                                  size=st.st_size, mtime_ns=st.st_mtime_ns, digest=digest)
+            _copy_data(src_path, dst_path, job.meta)
+            return CopyResult(True, job.src, job.dst, size=st.st_size,
+                              mtime_ns=st.st_mtime_ns, digest=digest)
+
+        if dst_path.exists() and not job.overwrite:
+            return CopyResult(True, job.src, job.dst, skipped=True)
+
+        if src_path.is_symlink():
+            try:
+                real = src_path.resolve(strict=True)
+                if real.is_file():
+                    _copy_data(real, dst_path, job.meta)
+                return CopyResult(True, job.src, job.dst, size=max(job.size, 0))
+            except Exception as e:
+                return CopyResult(False, job.src, job.dst, f"symlink error: {e}",
+                                  errno=getattr(e, "errno", None))
+
+        _copy_data(src_path, dst_path, job.meta)
+        return CopyResult(True, job.src, job.dst, size=max(job.size, 0))
+
+    except Exception as e:
+        return CopyResult(False, job.src, job.dst, str(e), errno=getattr(e, "errno", None))
+
+
+def copy_batch_job(jobs: List[CopyJob]) -> List[CopyResult]:
+    # copy_file_job never raises, so one bad file can't sink the batch
+    results = []
+    for job in jobs:
+        res = copy_file_job(job)
+        results.append(res)
+        if res.errno == errno.ECANCELED:
+            break
+    return results
+
+
+def _copy_range_fd(fsrc: int, fdst: int, offset: int, length: int):
+    """Copy [offset, offset+length) between two fds, kernel-side when possible."""
+    pos, end = offset, offset + length
+
+    if hasattr(os, "copy_file_range"):
+        try:
+            while pos < end:
+                _check_cancel()
+                n = os.copy_file_range(fsrc, fdst, min(CANCEL_SLICE, end - pos), pos, pos)
+                if n == 0:
+                    raise EOFError(f"source truncated at byte {pos}")
+                pos += n
+            return
+        except OSError as e:
+            if e.errno not in _KERNEL_COPY_FALLBACK:
+                raise
+
+    if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+        try:
+            os.lseek(fdst, pos, os.SEEK_SET)
+            while pos < end:
+                _check_cancel()
+                n = os.sendfile(fdst, fsrc, pos, min(CANCEL_SLICE, end - pos))
+                if n == 0:
+                    raise EOFError(f"source truncated at byte {pos}")
+                pos += n
+            return
+        except OSError as e:
+            if e.errno not in _KERNEL_COPY_FALLBACK:
+                raise
+
+    os.lseek(fsrc, pos, os.SEEK_SET)
+    os.lseek(fdst, pos, os.SEEK_SET)
+    while pos < end:
+        _check_cancel()
+        buf = os.read(fsrc, min(COPY_BUFFER_SIZE, end - pos))
+        if not buf:
+            raise EOFError(f"source truncated at byte {pos}")
+        view = memoryview(buf)
+        while view:
+            view = view[os.write(fdst, view):]
+        pos += len(buf)
+
+
+def copy_range_job(job: RangeJob) -> RangeResult:
+    return _timed(_copy_range, job)
+
+
+def _copy_range(job: RangeJob) -> RangeResult:
+    try:
+        digest = None
+        fsrc = os.open(job.src, os.O_RDONLY | _O_BINARY)
+        try:
+            fdst = os.open(job.dst, os.O_WRONLY | _O_BINARY)
+            try:
+                if job.verify != "off":
+                    digest = _copy_range_hashed(fsrc, fdst, job.offset, job.length)
+                else:
+                    _copy_range_fd(fsrc, fdst, job.offset, job.length)
+            finally:
+                os.close(fdst)
+        finally:
+            os.close(fsrc)
+
+        if digest is None:
+            return RangeResult(True, job.dst, job.offset, job.length)
+        if readback_digest(job.dst, job.offset, job.length, job.verify == "direct") != digest:
+            return RangeResult(False, job.dst, job.offset, job.length, VERIFY_MISMATCH,
+                               errno=errno.EIO, digest=digest, verified=False)
+        return RangeResult(True, job.dst, job.offset, job.length, digest=digest, verified=True)
+    except Exception as e:
+        return RangeResult(False, job.dst, job.offset, job.length, str(e),
+                           errno=getattr(e, "errno", None))
+
+
+def split_ranges(size: int, chunk: int) -> List[Tuple[int, int]]:
+    return [(off, min(chunk, size - off)) for off in range(0, size, chunk)]
+
+
+def remove_path(path: str, is_dir: bool):
+    if is_dir:
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+
+@dataclass
+class MetaBatch:
+    items: List[Tuple[str, str]]     # (src, dst)
+    policy: str
+
+
+@dataclass
+class MetaResult:
+    done: int
+    # (dst, error, errno) per failure
+    errors: list
+    # dst of every file whose metadata is in place
+    applied: list = field(default_factory=list)
+    worker: str = ""
+    elapsed: float = 0.0
+
+
+def apply_metadata_job(batch: MetaBatch) -> MetaResult:
+    return _timed(_apply_metadata_batch, batch)
+
+
+def _apply_metadata_batch(batch: MetaBatch) -> MetaResult:
+    errors, applied = [], []
+    for src, dst in batch.items:
+        try:
+            apply_metadata(src, dst, batch.policy)
+            applied.append(dst)
+        except OSError as e:
+            errors.append((dst, str(e), e.errno))
+    return MetaResult(len(applied), errors, applied)
+
+
+def restore_dir_metadata(dirs: Iterable[Tuple[str, str]], policy: str) -> list:
+    """
+    Directory (src, dst) metadata, deepest first, once nothing more will be
+    created inside them: a read-only parent then can't block its children.
+    Returns (dst, error, errno) per failure.
+    """
+    errors = []
+    if policy == "data":
+        return errors
+    for src, dst in sorted(dirs, key=lambda d: d[1].count(os.sep), reverse=True):
+        try:
+            apply_metadata(src, dst, policy)
+        except OSError as e:
+            errors.append((dst, str(e), e.errno))
+    return errors
+
+
+def delete_path_job(job: DeleteJob) -> DeleteResult:
+    return _timed(_delete_path, job)
+
+
+def _delete_path(job: DeleteJob) -> DeleteResult:
+    try:
+        _check_cancel()
+        remove_path(job.path, job.is_dir)
+        return DeleteResult(True, job.path, job.is_dir)
+    except Exception as e:
+        return DeleteResult(False, job.path, job.is_dir, str(e), errno=getattr(e, "errno", None))
+
+
+# =========================== VERIFY ===========================
+
+VERIFY_MISMATCH = "verify failed: destination differs from source"
+
+
+def _copy_range_hashed(fsrc: int, fdst: int, offset: int, length: int) -> str:
+    # Goes through user space on purpose: the bytes are hashed on their way past
+    h = hashlib.blake2b(digest_size=20)
+    pos, end = offset, offset + length
+    os.lseek(fsrc, pos, os.SEEK_SET)
+    os.lseek(fdst, pos, os.SEEK_SET)
+    while pos < end:
+        _check_cancel()
+        buf = os.read(fsrc, min(COPY_BUFFER_SIZE, end - pos))
+        if not buf:
+            raise EOFError(f"source truncated at byte {pos}")
+        h.update(buf)
+        view = memoryview(buf)
+        while view:
+            view = view[os.write(fdst, view):]
+        pos += len(buf)
+    return h.hexdigest()
+
+
+def _open_direct(path) -> Optional[int]:
+    if not hasattr(os, "O_DIRECT") or not hasattr(os, "preadv"):
+        return None
+    try:
+        return os.open(path, os.O_RDONLY | os.O_DIRECT)
+    except OSError as e:
+        # tmpfs and some network filesystems refuse O_DIRECT
+        if e.errno != errno.EINVAL:
+            raise
+        return None
+
+
+def readback_digest(path, offset: int, length: int, direct: bool = False) -> str:
+    """blake2b of [offset, offset+length) as it reads back from the destination."""
+    h = hashlib.blake2b(digest_size=20)
+    end = offset + length
+    fd = _open_direct(path) if direct else None
+
+    if fd is not None:
+        # O_DIRECT needs aligned offsets and buffers; mmap memory is page aligned
+        buf = mmap.mmap(-1, COPY_BUFFER_SIZE)
+        try:
+            pos = offset - offset % DIRECT_ALIGN
+            while pos < end:
+                n = os.preadv(fd, [buf], pos)
+                if n <= 0:
+                    break
+                h.update(buf[max(offset - pos, 0):min(n, end - pos)])
+                pos += n
+                if n < COPY_BUFFER_SIZE:
+                    break
+            return h.hexdigest()
+        finally:
+            buf.close()
+            os.close(fd)
+
+    with open(path, "rb") as f:
+        f.seek(offset)
+        remaining = length
+        while remaining:
+            chunk = f.read(min(HASH_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            h.update(chunk)
+            remaining -= len(chunk)
+    return h.hexdigest()
+
+
+def _skip_existing(job: CopyJob) -> Optional[CopyResult]:
+    """Sync / no-overwrite checks shared by the hashed copy and link paths."""
+    dst_path = Path(job.dst)
+    if job.sync:
+        st = os.stat(job.src)
+        unchanged, digest = _sync_check(job, st, dst_path)
+        if unchanged:
+            return CopyResult(True, job.src, job.dst, skipped=True, size=st.st_size,
+                              mtime_ns=st.st_mtime_ns, digest=digest)
+    elif not job.overwrite and dst_path.exists():
+        return CopyResult(True, job.src, job.dst, skipped=True)
+    return None
+
+
+def copy_hashed_job(job: CopyJob) -> CopyResult:
+    return _timed(_copy_hashed, job)
+
+
+def _copy_hashed(job: CopyJob) -> CopyResult:
+    # Hash while copying; the digest feeds verification and dedup link targets
+    try:
+        skip = _skip_existing(job)
+        if skip is not None:
+            return skip
+
+        _check_cancel()
+        _unshare(job.dst)
+        h = hashlib.blake2b(digest_size=20)
+        written = 0
+        try:
+            with open(job.src, "rb") as fsrc, open(job.dst, "wb") as fdst:
+                for chunk in iter(lambda: fsrc.read(COPY_BUFFER_SIZE), b""):
+                    _check_cancel()
+                    h.update(chunk)
+                    fdst.write(chunk)
+                    written += len(chunk)
+        except CopyCancelled:
+            # A half-written file would pass a later no-overwrite run
+            os.remove(job.dst)
+            raise
+        apply_metadata(job.src, job.dst, job.meta)
+        st = os.stat(job.src)
+        digest = h.hexdigest()
+
+        verified = None
+        if job.verify != "off":
+            verified = readback_digest(job.dst, 0, written, job.verify == "direct") == digest
+            if not verified:
+                return CopyResult(False, job.src, job.dst, VERIFY_MISMATCH, size=written,
+                                  errno=errno.EIO, digest=digest, verified=False)
+        return CopyResult(True, job.src, job.dst, size=st.st_size,
+                          mtime_ns=st.st_mtime_ns, digest=digest, verified=verified)
+    except Exception as e:
+        return CopyResult(False, job.src, job.dst, str(e), errno=getattr(e, "errno", None))
+
+
+# =========================== DEDUP JOBS ===========================
+
+def hash_file_job(job: CopyJob) -> HashResult:
+    return _timed(_hash_file, job)
+
+
+def _hash_file(job: CopyJob) -> HashResult:
+    try:
+        _check_cancel()
+        return HashResult(True, job, file_digest(job.src))
+    except Exception as e:
+        return HashResult(False, job, error=str(e), errno=getattr(e, "errno", None))
+
+
+def _reflink(target: str, dst: str):
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflink not supported on this platform")
+    with open(target, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+
+def link_file_job(link: LinkJob) -> CopyResult:
+    return _timed(_link_file, link)
+
+
+def _link_file(link: LinkJob) -> CopyResult:
+    job = link.job
+    try:
+        _check_cancel()
+        skip = _skip_existing(job)
+        if skip is not None:
+            return skip
+
+        st = os.stat(job.src)
+        if os.path.lexists(job.dst):
+            os.remove(job.dst)
+
+        methods = ("reflink", "hardlink") if link.method == "auto" else (link.method,)
+        for method in methods:
+            try:
+                if method == "reflink":
+                    _reflink(link.target, job.dst)
+                    apply_metadata(job.src, job.dst, job.meta)
+                else:
+                    # Hardlinks share the first copy's inode, metadata included
+                    os.link(link.target, job.dst)
+                # The source's mtime goes to the manifest: a hardlink can only carry one
+                # mtime for all its duplicates, so later syncs must match on the manifest
+                return CopyResult(True, job.src, job.dst, size=st.st_size,
+                                  mtime_ns=st.st_mtime_ns, digest=link.digest, linked=method)
+            except OSError:
+                if os.path.lexists(job.dst):
+                    os.remove(job.dst)
+
+        # Filesystem can't share blocks: plain copy
+        return _copy_hashed(job)
+    except Exception as e:
+        return CopyResult(False, job.src, job.dst, str(e), errno=getattr(e, "errno", None))
+
+
+# =========================== SYNC MANIFEST ===========================
+
+class SyncManifest:
+    """
+    Per-destination record of which source version each file was copied from,
+    so a re-run can skip unchanged files without stat-ing the destination.
+    """
+
+    def __init__(self, dst_root: Path):
+        self.path = dst_root / STATE_DIR_NAME / MANIFEST_NAME
+        self.previous: Dict[str, list] = {}
+        self.current: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.previous = data.get("files", {})
+        except (FileNotFoundError, ValueError):
+            self.previous = {}
+
+    def lookup(self, rel: str) -> Optional[Tuple[int, int, Optional[str]]]:
+        entry = self.previous.get(rel)
+        return tuple(entry) if entry else None
+
+    def record(self, rel: str, size: int, mtime_ns: int, digest: Optional[str]):
+        with self._lock:
+            self.current[rel] = [size, mtime_ns, digest]
+
+    def save(self, complete: bool):
+        # A partial run keeps the older entries for files it never reached
+        files = self.current if complete else {**self.previous, **self.current}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "files": files}, f)
+        os.replace(tmp, self.path)
+
+
+class ChecksumManifest:
+    """
+    blake2b-160 of every verified file in <dst>/.fastcopy/checksums.json.
+    Large files are listed per byte range, [offset, length, digest], the way
+    they were verified. Files a run skipped keep their earlier entry.
+    """
+
+    def __init__(self, dst_root: Path):
+        self.path = dst_root / STATE_DIR_NAME / CHECKSUMS_NAME
+        self.previous: Dict[str, object] = {}
+        self.current: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.previous = json.load(f).get("files", {})
+        except (FileNotFoundError, ValueError):
+            self.previous = {}
+
+    def record(self, rel: str, digest):
+        with self._lock:
+            self.current[rel] = digest
+
+    def carry(self, rel: str):
+        with self._lock:
+            if rel in self.previous:
+                self.current[rel] = self.previous[rel]
+
+    def save(self, complete: bool):
+        files = self.current if complete else {**self.previous, **self.current}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "algorithm": "blake2b-160", "files": files}, f)
+        os.replace(tmp, self.path)
+
+
+# =========================== RESUME JOURNAL ===========================
+
+def _sync_data(paths: Iterable[str]) -> set:
+    """Makes the files' data durable; returns the paths that could not be synced."""
+    # One sync() per batch beats an fsync per small file; fall back where there is none
+    if hasattr(os, "sync"):
+        os.sync()
+        return set()
+    # Windows' fsync (_commit) needs a handle open for writing
+    flags = (os.O_RDWR if os.name == "nt" else os.O_RDONLY) | _O_BINARY
+    failed = set()
+    for path in set(paths):
+        try:
+            fd = os.open(path, flags)
+        except OSError:
+            failed.add(path)    # moved on since: renamed into place, deleted by a rerun
+            continue
+        try:
+            os.fsync(fd)
+        except OSError:
+            failed.add(path)
+        finally:
+            os.close(fd)
+    return failed
+
+
+class CopyJournal:
+    """
+    Append-only log of finished work in <dst>/.fastcopy/journal.log:
+
+        F <tab> rel                      file done
+        R <tab> rel <tab> off <tab> len  byte range of a large file done
+
+    Kept only for runs that ask to be resumable; until open() every record is
+    dropped. Lines are held back and written in batches by a background
+    thread, so a crash loses at most JOURNAL_FSYNC_INTERVAL seconds of records.
+    Each batch first makes the recorded files' data durable, then appends and
+    fsyncs the lines: a record never reaches disk ahead of the bytes it vouches
+    for, and one whose file could not be synced is not written at all.
+    """
+
+    def __init__(self, dst_root: Path, interval: float = JOURNAL_FSYNC_INTERVAL):
+        self.root = dst_root
+        self.path = dst_root / STATE_DIR_NAME / JOURNAL_NAME
+        self.interval = interval
+        self.done: set = set()
+        self.ranges: Dict[str, set] = {}
+        self._f = None
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, str]] = []     # (line, destination path)
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if parts[0] == "F" and len(parts) == 2:
+                        self.done.add(parts[1])
+                    elif parts[0] == "R" and len(parts) == 4:
+                        self.ranges.setdefault(parts[1], set()).add((int(parts[2]), int(parts[3])))
+        except FileNotFoundError:
+            pass
+
+    def open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = open(self.path, "a", encoding="utf-8")
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def file_done(self, rel: str):
+        self._write(f"F\t{rel}\n", os.path.join(self.root, rel))
+
+    def range_done(self, rel: str, offset: int, length: int):
+        self._write(f"R\t{rel}\t{offset}\t{length}\n", os.path.join(self.root, rel) + PART_SUFFIX)
+
+    def _write(self, line: str, path: str):
+        if self._f is None:
+            return
+        with self._lock:
+            self._pending.append((line, path))
+
+    def _sync(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        failed = _sync_data(path for _, path in pending)
+        self._f.write("".join(line for line, path in pending if path not in failed))
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.interval):
+            self._sync()
+
+    def discard(self):
+        # A run that isn't resumable leaves no journal to trust later
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def close(self, complete: bool):
+        if self._f is None:
+            return
+        self._stop.set()
+        self._flusher.join()
+        self._sync()
+        self._f.close()
+        self._f = None
+        # Nothing left to resume
+        if complete:
+            os.remove(self.path)
+
+
+# =========================== MIRROR ===========================
+
+@dataclass
+class MirrorEntry:
+    name: str
+    kind: str        # "d" directory, "f" file, "o" anything else (dst symlinks etc.)
+    size: int = -1
+    mtime_ns: int = 0
+
+
+def _excluded_dir(name: str, top: bool) -> bool:
+    # The state dir is only ours at the top of the tree; deeper down it is user data
+    return name == EXCLUDED_DIR_NAME or (top and name == STATE_DIR_NAME)
+
+
+def mirror_entries(path: str, source: bool, top: bool = False) -> List[MirrorEntry]:
+    """
+    One directory's entries sorted by name, with the walker's rules: excluded
+    dirs (and the state dir when `top`) are invisible, the source follows file
+    symlinks but not directory ones, and on the destination side a symlink is
+    never entered.
+    """
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            if _excluded_dir(entry.name, top):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    entries.append(MirrorEntry(entry.name, "d"))
+                    continue
+                if source and entry.is_symlink() and entry.is_dir():
+                    continue
+                st = entry.stat(follow_symlinks=source)
+            except OSError:
+                entries.append(MirrorEntry(entry.name, "o"))
+                continue
+            kind = "f" if source or entry.is_file(follow_symlinks=False) else "o"
+            entries.append(MirrorEntry(entry.name, kind, st.st_size, st.st_mtime_ns))
+    entries.sort(key=lambda e: e.name)
+    return entries
+
+
+def case_insensitive(path: Path) -> bool:
+    """True when the filesystem under `path` treats names differing only in case as one."""
+    while not os.path.isdir(path) and path != path.parent:
+        path = path.parent
+    try:
+        fd, probe = tempfile.mkstemp(prefix="fastcopy-case-", dir=path)
+    except OSError:
+        return sys.platform in ("win32", "darwin")
+    os.close(fd)
+    try:
+        return os.path.exists(os.path.join(path, os.path.basename(probe).upper()))
+    finally:
+        os.remove(probe)
+
+
+def mirror_diff(src: Path, dst: Path, errors: list,
+                fold: bool = False) -> Iterable[Tuple[str, str, Optional[MirrorEntry]]]:
+    """
+    Streaming merge-diff of two trees: depth first, one sorted directory pair
+    at a time, so memory follows the widest directory, not the tree. Yields
+    (action, rel, entry) with action one of
+
+        dir      entering a source directory (rel "" is the root)
+        copy     file missing at the destination
+        update   file whose size or mtime differs
+        same     file already identical
+        delete   extraneous destination file or directory (entry.kind)
+        replace  destination entry of the wrong type, to remove before copying
+        rename   (fold) destination entry `entry.name` differs from rel only in
+                 case, to rename before anything else touches it
+
+    With `fold` (a case-insensitive destination) names are paired case-folded,
+    so a case-only rename never turns into a copy plus a delete of one file.
+    Directories that can't be read are appended to `errors` and skipped.
+    """
+    key = str.casefold if fold else str
+    stack = [""]
+    while stack:
+        rel = stack.pop()
+        yield "dir", rel, None
+        try:
+            src_entries = mirror_entries(os.path.join(src, rel), source=True, top=not rel)
+        except OSError as e:
+            errors.append((rel, str(e)))
+            continue
+        try:
+            dst_entries = mirror_entries(os.path.join(dst, rel), source=False, top=not rel)
+        except (FileNotFoundError, NotADirectoryError):
+            # New directory, or (dry run) one still blocked by a file to replace
+            dst_entries = []
+        if fold:
+            src_entries.sort(key=lambda e: key(e.name))
+            dst_entries.sort(key=lambda e: key(e.name))
+
+        src_files = {key(e.name) for e in src_entries if e.kind == "f"}
+        subdirs = []
+        i = j = 0
+        while i < len(src_entries) or j < len(dst_entries):
+            s = src_entries[i] if i < len(src_entries) else None
+            d = dst_entries[j] if j < len(dst_entries) else None
+            if d is None or (s is not None and key(s.name) < key(d.name)):
+                i += 1
+                if s.kind == "d":
+                    subdirs.append(s.name)
+                else:
+                    yield "copy", os.path.join(rel, s.name), s
+            elif s is None or key(d.name) < key(s.name):
+                j += 1
+                if d.name.endswith(PART_SUFFIX) and key(d.name[:-len(PART_SUFFIX)]) in src_files:
+                    # Unfinished large copy of a source file: overwritten or resumed, not extraneous
+                    continue
+                yield "delete", os.path.join(rel, d.name), d
+            else:
+                i += 1
+                j += 1
+                name = os.path.join(rel, s.name)
+                if s.name != d.name:
+                    yield "rename", name, d
+                if s.kind == "d":
+                    if d.kind != "d":
+                        yield "replace", name, d
+                    subdirs.append(s.name)
+                elif d.kind != "f":
+                    yield "replace", name, d
+                    yield "copy", name, s
+                elif s.size == d.size and abs(s.mtime_ns - d.mtime_ns) <= MTIME_TOLERANCE_NS:
+                    yield "same", name, s
+                else:
+                    yield "update", name, s
+
+        stack.extend(os.path.join(rel, n) for n in reversed(subdirs))
+
+
+# =========================== SHARDED MODE ===========================
+
+@dataclass
+class ShardJob:
+    src_root: str
+    dst_root: str
+    rel: str
+    recursive: bool
+    overwrite: bool
+    sync: bool = False
+    check_hash: bool = False
+    verify: str = "off"
+    meta: str = "full"
+
+
+@dataclass
+class ShardResult:
+    rel: str
+    files: int = 0
+    bytes: int = 0
+    bytes_copied: int = 0
+    skipped: int = 0
+    error_count: int = 0
+    # First SHARD_MAX_ERRORS of (src, dst, error)
+    errors: list = field(default_factory=list)
+    errnos: Counter = field(default_factory=Counter)
+    latency: Dict[str, Counter] = field(default_factory=dict)
+    cancelled: bool = False
+    meta_errors: int = 0
+    worker: str = ""
+    elapsed: float = 0.0
+
+    def add(self, res: CopyResult, latency: float):
+        self.files += 1
+        self.bytes += res.size
+        if not res.ok:
+            self.fail(res.src, res.dst, res.error, res.errno)
+        elif res.skipped:
+            self.skipped += 1
+        else:
+            self.bytes_copied += res.size
+            hist = self.latency.setdefault(_size_bucket(res.size), Counter())
+            hist[_latency_bucket(latency)] += 1
+
+    def fail(self, src: str, dst: str, error: str, err: Optional[int]):
+        self.error_count += 1
+        self.errnos[errno.errorcode.get(err, str(err)) if err else "other"] += 1
+        if len(self.errors) < SHARD_MAX_ERRORS:
+            self.errors.append((src, dst, error))
+
+
+# Live progress shared by all shard processes: (files, bytes)
+_shard_progress = None
+
+
+def _init_shard_worker(event, files, nbytes):
+    global _shard_progress
+    _init_process_worker(event)
+    _shard_progress = (files, nbytes)
+
+
+def copy_shard_job(job: ShardJob) -> ShardResult:
+    return _timed(_copy_shard, job)
+
+
+def _copy_shard(job: ShardJob) -> ShardResult:
+    res = ShardResult(job.rel)
+    dirs = []
+    stack = [job.rel]
+    while stack:
+        rel = stack.pop()
+        src_dir = os.path.join(job.src_root, rel)
+        dst_dir = os.path.join(job.dst_root, rel)
+        try:
+            os.makedirs(dst_dir, exist_ok=True)
+            with os.scandir(src_dir) as it:
+                entries = list(it)
+        except OSError as e:
+            res.fail(src_dir, dst_dir, str(e), e.errno)
+            continue
+        # Only a recursive shard owns its directories; the parent does the rest
+        if job.recursive:
+            dirs.append((src_dir, dst_dir))
+        copied = []
+
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if job.recursive and not entry.is_symlink() and \
+                        not _excluded_dir(entry.name, not rel):
+                    stack.append(os.path.join(rel, entry.name))
+                continue
+
+            try:
+                size = entry.stat().st_size
+            except OSError:
+                size = -1
+            t0 = time.perf_counter()
+            r = _copy_file(CopyJob(entry.path, os.path.join(dst_dir, entry.name), job.overwrite,
+                                   size, sync=job.sync, check_hash=job.check_hash,
+                                   verify=job.verify, meta="data"))
+            if r.errno == errno.ECANCELED:
+                res.cancelled = True
+                return res
+            res.add(r, time.perf_counter() - t0)
+            if r.ok and not r.skipped and job.meta != "data":
+                copied.append((r.src, r.dst))
+
+            if _shard_progress is not None:
+                files, nbytes = _shard_progress
+                with files.get_lock():
+                    files.value += 1
+                with nbytes.get_lock():
+                    nbytes.value += max(r.size, 0)
+
+        # The directory's files in one batch, after all of its data is in
+        if copied:
+            meta = _apply_metadata_batch(MetaBatch(copied, job.meta))
+            res.meta_errors += len(meta.errors)
+            for dst, error, err in meta.errors:
+                res.fail(dst, dst, f"metadata: {error}", err)
+
+    for dst, error, err in restore_dir_metadata(dirs, job.meta):
+        res.meta_errors += 1
+        res.fail(dst, dst, f"metadata: {error}", err)
+    return res
+
+
+def estimate_tree(path: str, recursive: bool = True, max_dirs: int = SHARD_PROBE_DIRS) -> int:
+    """
+    Rough cost of a subtree in bytes, a file's fixed cost counted as
+    AUTOTUNE_FILE_COST. Scans breadth first up to max_dirs directories and
+    extrapolates over the ones it didn't reach.
+    """
+    cost = scanned = 0
+    pending = deque([path])
+    while pending and scanned < max_dirs:
+        d = pending.popleft()
+        scanned += 1
+        try:
+            with os.scandir(d) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive and not _excluded_dir(entry.name, d == path):
+                                pending.append(entry.path)
+                            continue
+                        cost += entry.stat().st_size + AUTOTUNE_FILE_COST
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    if pending:
+        cost = cost * (scanned + len(pending)) // scanned
+    return cost
+
+
+def _subdirs(path: str, top: bool = False) -> List[str]:
+    try:
+        with os.scandir(path) as it:
+            return sorted(e.name for e in it if e.is_dir(follow_symlinks=False)
+                          and not _excluded_dir(e.name, top))
+    except OSError:
+        return []
+
+
+# =========================== DISCOVERY ===========================
+
+@dataclass
+class DirBatch:
+    rel: str
+    src_dir: str
+    dst_dir: str
+    files: List[Tuple[str, int]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+class ParallelWalker:
+    """
+    Walks the source with several os.scandir threads. Each directory is
+    created at the destination as soon as it is seen, and its files come
+    back as DirBatch items on a bounded queue, so copying starts while the
+    walk is still running and a huge tree never sits in memory.
+    """
+
+    _DONE = object()
+
+    def __init__(self, src: Path, dst: Path, walkers: int = DISCOVERY_WALKERS,
+                 queue_size: int = DISCOVERY_QUEUE_SIZE):
+        self.src = str(src)
+        self.dst = str(dst)
+        self.walkers = max(1, walkers)
+        self.out: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._dirs: "queue.Queue" = queue.Queue()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        self._dirs.put("")
+        for _ in range(self.walkers):
+            t = threading.Thread(target=self._run, daemon=True)
+            t.start()
+            self._threads.append(t)
+        threading.Thread(target=self._finish, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def __iter__(self):
+        while True:
+            item = self.out.get()
+            if item is self._DONE:
+                return
+            yield item
+
+    def _put(self, item):
+        # Never block forever on a consumer that has gone away
+        while not self._stop.is_set():
+            try:
+                self.out.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _finish(self):
+        self._dirs.join()
+        for _ in self._threads:
+            self._dirs.put(None)
+        self._put(self._DONE)
+
+    def _run(self):
+        while True:
+            rel = self._dirs.get()
+            if rel is None:
+                return
+            try:
+                if not self._stop.is_set():
+                    self._scan(rel)
+            except OSError as e:
+                self._put(DirBatch(rel, os.path.join(self.src, rel), "", error=str(e)))
+            finally:
+                self._dirs.task_done()
+
+    def _scan(self, rel: str):
+        src_dir = os.path.join(self.src, rel) if rel else self.src
+        dst_dir = os.path.join(self.dst, rel) if rel else self.dst
+        os.makedirs(dst_dir, exist_ok=True)
+
+        files: List[Tuple[str, int]] = []
+        sent = False
+        with os.scandir(src_dir) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if is_dir:
+                    # Like os.walk(followlinks=False): symlinked dirs are not entered
+                    if _excluded_dir(entry.name, not rel) or entry.is_symlink():
+                        continue
+                    self._dirs.put(os.path.join(rel, entry.name))
+                    continue
+
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    size = -1
+                files.append((entry.name, size))
+
+                if len(files) >= DISCOVERY_BATCH:
+                    self._put(DirBatch(rel, src_dir, dst_dir, files))
+                    files = []
+                    sent = True
+
+        # Empty directories too: the metadata pass needs to know about them
+        if files or not sent:
+            self._put(DirBatch(rel, src_dir, dst_dir, files))
+
+
+# =========================== WORKER ===========================
+
+@dataclass
+class LaneStats:
+    files: int = 0
+    bytes: int = 0
+    started: float = 0.0
+    ended: float = 0.0
+
+    def begin(self):
+        if not self.started:
+            self.started = time.monotonic()
+
+    def add(self, nbytes: int):
+        self.files += 1
+        self.bytes += nbytes
+        self.ended = time.monotonic()
+
+    def summary(self) -> str:
+        elapsed = max(self.ended - self.started, 1e-6)
+        mb = self.bytes / (1024 * 1024)
+        return (f"{self.files} קבצים, {mb:.1f} MB, "
+                f"{mb / elapsed:.1f} MB/s, {self.files / elapsed:.1f} קבצים/ש'")
+
+    def as_dict(self) -> dict:
+        elapsed = max(self.ended - self.started, 1e-6) if self.files else 0.0
+        return {"files": self.files, "bytes": self.bytes, "elapsed_s": round(elapsed, 3),
+                "bytes_per_s": round(self.bytes / elapsed) if elapsed else 0,
+                "files_per_s": round(self.files / elapsed, 1) if elapsed else 0}
+
+
+def _size_bucket(size: int) -> str:
+    for limit, label in SIZE_BUCKETS:
+        if size < limit:
+            return label
+    return f">={SIZE_BUCKETS[-1][1][1:]}"
+
+
+def _latency_bucket(seconds: float) -> str:
+    ms = seconds * 1000
+    for limit in LATENCY_BUCKETS_MS:
+        if ms < limit:
+            return f"<{limit}ms"
+    return f">={LATENCY_BUCKETS_MS[-1]}ms"
+
+
+_SIZE_LABELS = [label for _, label in SIZE_BUCKETS] + [_size_bucket(SIZE_BUCKETS[-1][0])]
+_LATENCY_LABELS = [f"<{ms}ms" for ms in LATENCY_BUCKETS_MS] + [_latency_bucket(1e9)]
+
+
+class CopyStats:
+    """Run-wide counters behind the live UI stats line and the JSON report."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.bytes_done = 0
+        self.bytes_copied = 0
+        self.bytes_seen = 0
+        self.files_done = 0
+        self.busy: Dict[str, float] = {}
+        self.jobs: Counter = Counter()
+        self.latency: Dict[str, Counter] = {}
+        self.errnos: Counter = Counter()
+
+    def worker_time(self, worker: str, elapsed: float):
+        if worker:
+            self.busy[worker] = self.busy.get(worker, 0.0) + elapsed
+            self.jobs[worker] += 1
+
+    def shard_done(self, res: "ShardResult"):
+        self.files_done += res.files
+        self.bytes_done += res.bytes
+        self.bytes_copied += res.bytes_copied
+        self.errnos.update(res.errnos)
+        for size, hist in res.latency.items():
+            self.latency.setdefault(size, Counter()).update(hist)
+
+    def file_done(self, res: CopyResult, latency: float):
+        self.files_done += 1
+        self.bytes_done += res.size
+        if not res.ok:
+            name = errno.errorcode.get(res.errno, str(res.errno)) if res.errno else "other"
+            self.errnos[name] += 1
+        elif not res.skipped and not res.linked:
+            self.bytes_copied += res.size
+            hist = self.latency.setdefault(_size_bucket(res.size), Counter())
+            hist[_latency_bucket(latency)] += 1
+
+    def snapshot(self, total_files: int) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        bps = self.bytes_done / elapsed
+        eta = None
+        if total_files and bps > 0:
+            eta = max(self.bytes_seen - self.bytes_done, 0) / bps
+        return {"elapsed_s": elapsed, "bytes_per_s": bps,
+                "files_per_s": self.files_done / elapsed, "eta_s": eta}
+
+    def report(self, **run_info) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return {
+            **run_info,
+            "started_at": self.started_at,
+            "elapsed_s": round(elapsed, 3),
+            "bytes": self.bytes_copied,
+            "bytes_processed": self.bytes_done,
+            "bytes_per_s": round(self.bytes_copied / elapsed),
+            "files_per_s": round(self.files_done / elapsed, 1),
+            "per_worker": {w: {"busy_s": round(b, 3), "idle_s": round(max(elapsed - b, 0.0), 3),
+                            "jobs": self.jobs[w]}
+                        for w, b in sorted(self.busy.items())},
+            "latency_histogram": {size: {b: self.latency[size][b] for b in _LATENCY_LABELS
+                                         if b in self.latency[size]}
+                                  for size in _SIZE_LABELS if size in self.latency},
+            "errors_by_errno": dict(self.errnos),
+        }
+
+
+class WorkerAutoTuner:
+    """
+    Decides how many workers may be busy at once. Throughput is averaged over
+    AUTOTUNE_SAMPLES windows of AUTOTUNE_INTERVAL seconds per level; the level
+    keeps moving while that improves, turns back when it drops, and settles on
+    the best level, re-probing every AUTOTUNE_REPROBE decisions.
+    """
+
+    def __init__(self, maximum: int, start: int = AUTOTUNE_START,
+                 interval: float = AUTOTUNE_INTERVAL):
+        self.maximum = max(1, maximum)
+        self.active = min(start, self.maximum)
+        self.interval = interval
+        self.history: List[dict] = []
+        self._direction = 1
+        self._best_score = 0.0
+        self._best_active = self.active
+        self._holds = 0
+        self._samples: List[float] = []
+        self._window_start = time.monotonic()
+        self._bytes = 0
+        self._files = 0
+
+    def observe(self, nbytes: int):
+        self._bytes += nbytes
+        self._files += 1
+
+    def tick(self) -> Optional[Tuple[int, int, float]]:
+        """Returns (old, new, score) when the active count changes."""
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < self.interval:
+            return None
+
+        self._samples.append((self._bytes + self._files * AUTOTUNE_FILE_COST) / elapsed)
+        self._window_start, self._bytes, self._files = now, 0, 0
+        if len(self._samples) < AUTOTUNE_SAMPLES:
+            return None
+
+        score = sum(self._samples) / len(self._samples)
+        self._samples.clear()
+        old = self.active
+
+        if score > self._best_score * (1 + AUTOTUNE_TOLERANCE):
+            self._best_score, self._best_active = score, old
+            self._holds = 0
+            self.active = self._step(old, self._direction)
+            if self.active == old:
+                self._direction = -self._direction
+        elif score < self._best_score * (1 - AUTOTUNE_TOLERANCE) and old != self._best_active:
+            # Overshot: go back to the best level and try the other side next time
+            self._direction = -self._direction
+            self.active = self._best_active
+        else:
+            # Plateau: hold, re-baseline for the current file mix, re-probe now and then
+            self._best_score, self._best_active = score, old
+            self._holds += 1
+            if self._holds >= AUTOTUNE_REPROBE:
+                self._holds = 0
+                self.active = self._step(old, self._direction)
+
+        if self.active == old:
+            return None
+        self.history.append({"t": round(time.monotonic(), 3), "from": old,
+                             "to": self.active, "score": round(score)})
+        return old, self.active, score
+
+    def _step(self, n: int, direction: int) -> int:
+        if direction > 0:
+            return min(self.maximum, n + max(1, n // 2))
+        return max(1, n - max(1, n // 3))
+
+
+class DedupIndex:
+    """
+    Parent-side dedup state. The first file of each size is copied (and
+    hashed on the way); later files of a seen size are hashed first and
+    then linked to a finished copy with the same (size, digest), or copied
+    if there is none. Candidates whose size class still has a copy in
+    flight wait for it.
+    """
+
+    def __init__(self):
+        self.sizes: set = set()
+        self.targets: Dict[Tuple[int, str], str] = {}
+        self.inflight: Dict[str, int] = {}            # primary dst → size
+        self.inflight_sizes: Counter = Counter()
+        self.waiting: Dict[int, List[Tuple[CopyJob, str]]] = {}
+        self.linked: Counter = Counter()
+        self.bytes_saved = 0
+
+    def add_primary(self, job: CopyJob):
+        self.inflight[job.dst] = job.size
+        self.inflight_sizes[job.size] += 1
+
+    def primary_done(self, res: CopyResult) -> Tuple[int, List[Tuple[CopyJob, str]]]:
+        size = self.inflight.pop(res.dst)
+        self.inflight_sizes[size] -= 1
+        if res.ok and res.digest and not res.skipped:
+            self.targets.setdefault((size, res.digest), res.dst)
+        return size, self.waiting.pop(size, [])
+
+
+class JobStore:
+    """
+    Discovered files held for the largest-first schedule. Each directory's
+    (src, dst, rel) is stored once; per file there is only its name plus a
+    directory index and a size in typed arrays. CopyJobs are built as they
+    are handed out, and futures only as the window lets them in.
+    """
+
+    __slots__ = ("dirs", "names", "dir_idx", "sizes")
+
+    def __init__(self):
+        self.dirs: List[Tuple[str, str, str]] = []
+        self.names: List[str] = []
+        self.dir_idx = array("L")
+        self.sizes = array("q")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add_dir(self, src_dir: str, dst_dir: str, rel: str) -> int:
+        self.dirs.append((src_dir, dst_dir, rel))
+        return len(self.dirs) - 1
+
+    def add(self, d: int, name: str, size: int):
+        self.names.append(name)
+        self.dir_idx.append(d)
+        self.sizes.append(size)
+
+    def largest_first(self) -> array:
+        # Stable: equal sizes keep walk order
+        return array("L", sorted(range(len(self.names)), key=self.sizes.__getitem__,
+                                 reverse=True))
+
+
+@dataclass
+class _LargeFile:
+    job: CopyJob
+    st: os.stat_result
+    rel: str
+    pending: int
+    error: Optional[str] = None
+    errno: Optional[int] = None
+    started: float = field(default_factory=time.perf_counter)
+    # [offset, length, digest] of each range verified in this run
+    digests: list = field(default_factory=list)
+    mismatch: bool = False
+    cancelled: bool = False
+
+
+class FastCopyWorker:
+    def __init__(self, src: Path, dst: Path, overwrite: bool, mode: str,
+                 workers: int, quick_mode: bool, ui_callback,
+                 sync: bool = False, check_hash: bool = False,
+                 large_threshold: int = LARGE_FILE_THRESHOLD,
+                 chunk_size: int = LARGE_CHUNK_SIZE,
+                 batch_files: Optional[int] = None,
+                 batch_bytes: int = BATCH_MAX_BYTES,
+                 window: Optional[int] = None,
+                 walkers: int = DISCOVERY_WALKERS,
+                 resume: bool = False,
+                 report_path: Optional[Path] = None,
+                 auto_workers: bool = False,
+                 dedup: str = "off",
+                 verify: str = "off",
+                 schedule: str = "walk",
+                 mirror: bool = False,
+                 dry_run: bool = False,
+                 metadata: str = "full"):
+        self.src = src
+        self.dst = dst
+        self.overwrite = overwrite
+        self.mode = mode
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.workers = max(1, workers)
+        if mode == "sharded" and auto_workers:
+            # The tuner can't resize whole-subtree shards, and `workers` is only its
+            # ceiling: run one process per CPU instead
+            self.workers = os.cpu_count() or 1
+        if mode in ("processes", "sharded") and sys.platform == "win32":
+            self.workers = min(self.workers, WINDOWS_MAX_PROCESSES)
+        self.quick_mode = quick_mode
+        self.sync = sync
+        self.check_hash = check_hash
+        self.large_threshold = large_threshold
+        self.chunk_size = max(COPY_BUFFER_SIZE, chunk_size)
+        # Batching pays off where each submit costs a pickle + IPC round trip
+        if batch_files is None:
+            batch_files = BATCH_MAX_FILES if mode == "processes" else 1
+        self.batch_files = max(1, batch_files)
+        self.batch_bytes = batch_bytes
+        if window and window > 0:
+            self.window = window
+        else:
+            self.window = self.workers * WINDOW_PER_WORKER
+        self.walkers = max(1, walkers)
+        self.resume = resume
+        self.report_path = report_path
+        # With auto workers the pool is sized to self.workers and the tuner
+        # decides how many of them get work at a time
+        self.tuner = WorkerAutoTuner(self.workers) if auto_workers else None
+        if dedup not in DEDUP_MODES:
+            raise ValueError(f"dedup must be one of {DEDUP_MODES}")
+        self.dedup = dedup
+        self.dedup_index = DedupIndex() if dedup != "off" else None
+        if verify not in VERIFY_MODES:
+            raise ValueError(f"verify must be one of {VERIFY_MODES}")
+        self.verify = verify
+        if schedule not in SCHEDULES:
+            raise ValueError(f"schedule must be one of {SCHEDULES}")
+        self.schedule = schedule
+        self.mirror = mirror
+        self.dry_run = dry_run
+        if metadata not in METADATA_POLICIES:
+            raise ValueError(f"metadata must be one of {METADATA_POLICIES}")
+        self.metadata = metadata
+        self.mirror_counts: Counter = Counter()
+        self._ex = None
+        self._cancel = False
+        self._cancel_event = None
+        self.ui = ui_callback
+
+        self.manifest: Optional[SyncManifest] = None
+        self.checksums: Optional[ChecksumManifest] = None
+        self.journal: Optional[CopyJournal] = None
+        self.lanes = {"small": LaneStats(), "large": LaneStats()}
+        self.stats = CopyStats()
+        self._last_stats = 0.0
+        self._large: Dict[str, _LargeFile] = {}
+        self._batch: List[CopyJob] = []
+        self._batch_size = 0
+        self._total = 0
+        self._discovered = 0
+        self._copied = 0
+        self._skipped = 0
+        self._errors = 0
+        self._verified = 0
+        self._verify_failed = 0
+        self._cancelled_jobs = 0
+        self._deleted = 0
+        self.shards: List[dict] = []
+        self._meta_pending: List[Tuple[str, str]] = []
+        # dst -> (rel, result, journal): bookkeeping held back until the metadata lands
+        self._meta_records: Dict[str, tuple] = {}
+        self._dirs: Dict[str, Tuple[str, str]] = {}
+        self._meta_errors = 0
+        self._shard_costs: Dict[str, int] = {}
+
+    def cancel(self):
+        self._cancel = True
+        # Running jobs see this between chunks, in every worker thread/process
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel
+
+    def start(self):
+        try:
+            if not self.src.exists():
+                self.ui.fatal("תיקיית המקור לא קיימת.")
+                self.ui.finished(False)
+                return
+
+            if not self.src.is_dir():
+                self.ui.fatal("המקור אינו תיקייה.")
+                self.ui.finished(False)
+                return
+
+            if str(self.dst.resolve()).startswith(str(self.src.resolve()) + os.sep):
+                self.ui.fatal("תיקיית היעד בתוך תיקיית המקור.")
+                self.ui.finished(False)
+                return
+
+            if self.mirror and self.dry_run:
+                # Nothing is written, not even the state dir
+                self.ui.finished(self._mirror_dry_run())
+                return
+
+            self.dst.mkdir(parents=True, exist_ok=True)
+
+            if self.mode == "sharded":
+                self._sharded_notes()
+
+            if self.sync and self.mode != "sharded":
+                self.manifest = SyncManifest(self.dst)
+                self.manifest.load()
+                self.ui.log(f"מצב סנכרון: {len(self.manifest.previous)} רשומות במניפסט.")
+
+            if self.verify != "off" and self.mode != "sharded":
+                self.checksums = ChecksumManifest(self.dst)
+                self.checksums.load()
+                self.ui.log(f"אימות פעיל ({self.verify}): כל קובץ נקרא חזרה מהיעד ומושווה.")
+
+            self.journal = CopyJournal(self.dst)
+            if self.resume:
+                self.journal.load()
+                self.ui.log(f"המשך ריצה: {len(self.journal.done)} קבצים כבר הועתקו, "
+                            f"{len(self.journal.ranges)} קבצים גדולים חלקיים.")
+                self.journal.open()
+            else:
+                self.journal.discard()
+
+            if self.quick_mode:
+                self.ui.log("מצב מהיר: מתחיל ללא ספירה מוקדמת.")
+            else:
+                # ACCURATE: the total grows while discovery runs alongside the copy
+                self.ui.log("מצב מדויק: סופר קבצים תוך כדי העתקה…")
+
+            if self.mode == "sharded":
+                success = self._execute_sharded()
+            else:
+                if self.mirror:
+                    self.ui.log("מצב מראה: קבצים שאינם במקור יימחקו מהיעד.")
+                    jobs_iter = self._mirror_jobs()
+                elif self.schedule == "largest" and not self.quick_mode:
+                    jobs_iter = self._largest_first(self.src, self.dst)
+                else:
+                    if self.schedule == "largest":
+                        self.ui.log("תזמון 'הגדולים קודם' זמין רק במצב מדויק; מעתיק לפי סדר הסריקה.")
+                    jobs_iter = self._collect_jobs(self.src, self.dst)
+                success = self._execute_streaming(jobs_iter)
+
+            if self.manifest is not None:
+                self.manifest.save(complete=not self._cancel)
+            if self.checksums is not None:
+                self.checksums.save(complete=not self._cancel)
+            self.journal.close(complete=success and not self._cancel)
+            self.journal = None
+            self._write_report(success)
+
+            self.ui.finished(success)
+
+        except Exception as e:
+            if self.journal is not None:
+                self.journal.close(complete=False)
+            self.ui.fatal(f"שגיאה: {e}")
+            self.ui.finished(False)
+
+    def _write_report(self, success: bool):
+        # Only on request: a file left in the copied tree would show up as extra data
+        if self.report_path is None:
+            return
+        report = self.stats.report(
+            src=str(self.src), dst=str(self.dst), mode=self.mode, workers=self.workers,
+            quick_mode=self.quick_mode, schedule=self.schedule, window=self.window,
+            batch_files=self.batch_files,
+            sync=self.sync, success=success, cancelled=self._cancel,
+            files={"discovered": self._discovered, "processed": self._copied,
+                   "skipped": self._skipped, "errors": self._errors,
+                   "not_processed": self._discovered - self._copied,
+                   "deleted": self._deleted,
+                   "partial": sorted(lf.rel for lf in self._large.values())},
+            lanes={name: lane.as_dict() for name, lane in self.lanes.items()},
+            autotune=({"final": self.tuner.active, "history": self.tuner.history}
+                      if self.tuner else None),
+            dedup=({"mode": self.dedup, "linked": dict(self.dedup_index.linked),
+                    "bytes_saved": self.dedup_index.bytes_saved}
+                   if self.dedup_index else None),
+            mirror=dict(self.mirror_counts) if self.mirror else None,
+            shards=self.shards if self.mode == "sharded" else None,
+            metadata={"policy": self.metadata, "errors": self._meta_errors},
+            verify=({"mode": self.verify, "verified": self._verified,
+                     "failed": self._verify_failed}
+                    if self.verify != "off" else None),
+        )
+        try:
+            self.report_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.report_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            self.ui.log(f"דוח נשמר: {self.report_path}")
+        except OSError as e:
+            self.ui.log(f"שגיאה בשמירת הדוח: {e}")
+
+    def _rel(self, dst: str) -> str:
+        return Path(os.path.relpath(dst, self.dst)).as_posix()
+
+    def _walk(self, src: Path, dst: Path) -> Iterable[DirBatch]:
+        walker = ParallelWalker(src, dst, self.walkers)
+        walker.start()
+        try:
+            for batch in walker:
+                if self._cancel:
+                    return
+
+                if batch.error:
+                    self._errors += 1
+                    self.ui.log(f"שגיאה בסריקה: {batch.src_dir}: {batch.error}")
+                    continue
+
+                if self.metadata != "data":
+                    self._dirs[batch.rel] = (batch.src_dir, batch.dst_dir)
+                self._discovered += len(batch.files)
+                self.stats.bytes_seen += sum(max(size, 0) for _, size in batch.files)
+                if not self.quick_mode:
+                    self._total = self._discovered
+                yield batch
+        finally:
+            walker.stop()
+
+        if not self.quick_mode:
+            self.ui.log(f"נמצאו {self._discovered} קבצים.")
+            self.ui.progress(self._copied, self._total)
+
+    def _make_job(self, src_dir: str, dst_dir: str, rel: str, name: str,
+                  size: int) -> Optional[CopyJob]:
+        """CopyJob for one discovered file, or None when the journal has it done."""
+        src, dst = os.path.join(src_dir, name), os.path.join(dst_dir, name)
+        key = (Path(rel) / name).as_posix()
+        if key in self.journal.done:
+            self._handle_result(CopyResult(True, src, dst, skipped=True, size=max(size, 0)),
+                                journal=False)
+            return None
+
+        job = CopyJob(src, dst, self.overwrite, size, verify=self.verify, meta="data")
+        if self.manifest is not None:
+            job.sync = True
+            job.check_hash = self.check_hash
+            job.known = self.manifest.lookup(key)
+        return job
+
+    def _collect_jobs(self, src: Path, dst: Path) -> Iterable[CopyJob]:
+        for batch in self._walk(src, dst):
+            for name, size in batch.files:
+                job = self._make_job(batch.src_dir, batch.dst_dir, batch.rel, name, size)
+                if job is not None:
+                    yield job
+
+    def _largest_first(self, src: Path, dst: Path) -> Iterable[CopyJob]:
+        # LPT: the longest copies start first, small files fill the gaps at the end
+        store = JobStore()
+        for batch in self._walk(src, dst):
+            d = store.add_dir(batch.src_dir, batch.dst_dir, batch.rel)
+            for name, size in batch.files:
+                store.add(d, name, size)
+        if self._cancel:
+            return
+
+        self.ui.total_known(self._total)
+        self.ui.log(f"תזמון: {len(store)} קבצים, מהגדול לקטן.")
+        for i in store.largest_first():
+            src_dir, dst_dir, rel = store.dirs[store.dir_idx[i]]
+            job = self._make_job(src_dir, dst_dir, rel, store.names[i], store.sizes[i])
+            if job is not None:
+                yield job
+
+    def _count_discovered(self, size: int):
+        self._discovered += 1
+        self.stats.bytes_seen += max(size, 0)
+        if not self.quick_mode:
+            self._total = self._discovered
+
+    def _mirror_jobs(self) -> Iterable[object]:
+        errors: list = []
+        fold = case_insensitive(self.dst)
+        for action, rel, entry in mirror_diff(self.src, self.dst, errors, fold):
+            if self._cancel:
+                return
+            for bad_rel, error in errors:
+                self._errors += 1
+                self.ui.log(f"שגיאה בסריקה: {os.path.join(self.src, bad_rel)}: {error}")
+            errors.clear()
+
+            dst = os.path.join(self.dst, rel)
+            if action == "dir":
+                os.makedirs(dst, exist_ok=True)
+                if self.metadata != "data":
+                    self._dirs[rel] = (os.path.join(self.src, rel), dst)
+                continue
+
+            self.mirror_counts[action] += 1
+            if action == "delete":
+                yield DeleteJob(dst, entry.kind == "d")
+                continue
+            if action == "rename":
+                # In place before the update, delete or descent that follows
+                try:
+                    os.rename(os.path.join(os.path.dirname(dst), entry.name), dst)
+                except OSError as e:
+                    self._errors += 1
+                    self.ui.log(f"שגיאה בשינוי שם: {dst}: {e}")
+                continue
+            if action == "replace":
+                # Must be gone before the copy (or the mkdir) that follows
+                try:
+                    remove_path(dst, entry.kind == "d")
+                    self._deleted += 1
+                except OSError as e:
+                    self._errors += 1
+                    self.ui.log(f"שגיאה במחיקה: {dst}: {e}")
+                continue
+
+            self._count_discovered(entry.size)
+            src = os.path.join(self.src, rel)
+            if action == "same":
+                self._handle_result(CopyResult(True, src, dst, skipped=True, size=entry.size,
+                                               mtime_ns=entry.mtime_ns))
+                continue
+            yield CopyJob(src, dst, True, entry.size, verify=self.verify, meta="data")
+
+        if not self.quick_mode:
+            self.ui.log(f"נמצאו {self._discovered} קבצים.")
+
+    def _mirror_dry_run(self) -> bool:
+        errors: list = []
+        for action, rel, entry in mirror_diff(self.src, self.dst, errors,
+                                              case_insensitive(self.dst)):
+            if self._cancel:
+                break
+            if action in PLAN_MARKS:
+                self.mirror_counts[action] += 1
+                suffix = "/" if entry.kind == "d" and action in ("delete", "replace") else ""
+                # The plan is the output of a dry run, not log chatter
+                self.ui.plan(action, Path(rel).as_posix() + suffix)
+            elif action == "same":
+                self.mirror_counts[action] += 1
+
+        for rel, error in errors:
+            self.ui.log(f"שגיאה בסריקה: {os.path.join(self.src, rel)}: {error}")
+        c = self.mirror_counts
+        self.ui.log(f"סימולציה: {c['copy']} להעתקה, {c['update']} לעדכון, "
+                    f"{c['delete'] + c['replace']} למחיקה, {c['rename']} לשינוי שם, "
+                    f"{c['same']} ללא שינוי. לא בוצע דבר.")
+        return not errors and not self._cancel
+
+    def _sharded_notes(self):
+        # These need per-file bookkeeping in the parent, which sharded mode avoids
+        ignored = [name for name, on in (("mirror", self.mirror), ("dedup", self.dedup != "off"),
+                                         ("resume", self.resume),
+                                         ("schedule", self.schedule != "walk"),
+                                         ("auto workers", self.tuner is not None)) if on]
+        if ignored:
+            self.ui.log("מצב מפוצל: לא נתמך ויידלג: " + ", ".join(ignored) + ".")
+        if self.sync:
+            self.ui.log("מצב מפוצל: סנכרון לפי גודל ותאריך בלבד, ללא מניפסט.")
+        if self.verify != "off":
+            self.ui.log("מצב מפוצל: אימות פעיל, ללא קובץ checksums.")
+
+    def _plan_shards(self) -> List[Tuple[str, bool, int]]:
+        """(rel, recursive, estimated cost) per shard, largest first."""
+        src = str(self.src)
+        shards = [("", False, estimate_tree(src, recursive=False))]
+        shards += [(name, True, estimate_tree(os.path.join(src, name)))
+                   for name in _subdirs(src, top=True)]
+
+        # Too few shards to keep every worker busy: split the biggest one a level down
+        leaves = set()
+        while len(shards) < self.workers * SHARDS_PER_WORKER:
+            candidates = [sh for sh in shards if sh[1] and sh[0] not in leaves]
+            if not candidates:
+                break
+            big = max(candidates, key=lambda sh: sh[2])
+            path = os.path.join(src, big[0])
+            children = _subdirs(path)
+            if not children:
+                leaves.add(big[0])
+                continue
+            shards.remove(big)
+            shards.append((big[0], False, estimate_tree(path, recursive=False)))
+            shards += [(os.path.join(big[0], c), True, estimate_tree(os.path.join(path, c)))
+                       for c in children]
+
+        return sorted(shards, key=lambda sh: sh[2], reverse=True)
+
+    def _execute_sharded(self) -> bool:
+        shards = self._plan_shards()
+        self.ui.log(f"מצב מפוצל: {len(shards)} תתי-עצים על {self.workers} תהליכים.")
+
+        ctx = multiprocessing.get_context("spawn")
+        self._cancel_event = ctx.Event()
+        if self._cancel:
+            self._cancel_event.set()
+        files, nbytes = ctx.Value("q", 0), ctx.Value("q", 0)
+        ex = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                 initializer=_init_shard_worker,
+                                 initargs=(self._cancel_event, files, nbytes))
+        self._shard_costs = {rel: cost for rel, _, cost in shards}
+        # Shards are independent and few: submit them all, largest first (LPT)
+        inflight = {ex.submit(copy_shard_job,
+                              ShardJob(str(self.src), str(self.dst), rel, recursive,
+                                       self.overwrite, self.sync, self.check_hash, self.verify,
+                                       self.metadata))
+                    for rel, recursive, _ in shards}
+        # Workers restore the directories of their own subtrees; the rest is ours
+        if self.metadata != "data":
+            self._dirs = {rel: (os.path.join(self.src, rel), os.path.join(self.dst, rel))
+                          for rel, recursive, _ in shards if not recursive}
+        try:
+            while inflight and not self._cancel:
+                done, inflight = wait(inflight, timeout=STATS_INTERVAL,
+                                      return_when=FIRST_COMPLETED)
+                for f in done:
+                    self._on_done(f)
+                # Shards only report at the end; live numbers come from the shared counters
+                self.ui.progress(files.value, self._total)
+        finally:
+            if self._cancel:
+                self._abort(ex, inflight)
+            else:
+                ex.shutdown(wait=True)
+
+        self._restore_dirs()
+        return self._finish_summary()
+
+    def _handle_shard(self, res: ShardResult):
+        self.stats.shard_done(res)
+        self._meta_errors += res.meta_errors
+        self._discovered += res.files
+        self._copied += res.files
+        self._skipped += res.skipped
+        self._errors += res.error_count
+        for src, dst, error in res.errors:
+            self.ui.log(f"שגיאה: {src} → {dst}: {error}")
+        if res.error_count > len(res.errors):
+            self.ui.log(f"…ועוד {res.error_count - len(res.errors)} שגיאות ב-{res.rel or '.'}")
+        self.shards.append({"rel": res.rel or ".", "estimate": self._shard_costs.get(res.rel),
+                            "files": res.files, "bytes": res.bytes_copied,
+                            "elapsed_s": round(res.elapsed, 3), "cancelled": res.cancelled})
+        self.ui.stats(self.stats.snapshot(self._total))
+
+    def _get_executor(self):
+        if self.mode == "processes":
+            ctx = multiprocessing.get_context("spawn")
+            self._cancel_event = ctx.Event()
+            if self._cancel:
+                self._cancel_event.set()
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=ctx,
+                initializer=_init_process_worker,
+                initargs=(self._cancel_event,)
+            )
+        self._cancel_event = threading.Event()
+        if self._cancel:
+            self._cancel_event.set()
+        return ThreadPoolExecutor(max_workers=self.workers, initializer=_init_pool_worker,
+                                  initargs=(self._cancel_event,))
+
+    def _submit(self, ex, job) -> list:
+        if isinstance(job, DeleteJob):
+            return [ex.submit(delete_path_job, job)]
+        if job.size >= self.large_threshold:
+            return self._submit_large(ex, job)
+        self.lanes["small"].begin()
+
+        if self.dedup_index is not None and job.size >= DEDUP_MIN_SIZE:
+            return self._submit_dedup(ex, job)
+
+        if self.batch_files == 1 or not 0 <= job.size < SMALL_FILE_THRESHOLD:
+            return [ex.submit(copy_file_job, job)]
+
+        self._batch.append(job)
+        self._batch_size += job.size
+        if len(self._batch) >= self.batch_files or self._batch_size >= self.batch_bytes:
+            return self._flush_batch(ex)
+        return []
+
+    def _submit_dedup(self, ex, job: CopyJob) -> list:
+        index = self.dedup_index
+        if job.size not in index.sizes:
+            # Size prefilter: a size seen for the first time can't be a duplicate yet
+            index.sizes.add(job.size)
+            index.add_primary(job)
+            return [ex.submit(copy_hashed_job, job)]
+        return [ex.submit(hash_file_job, job)]
+
+    def _dedup_place(self, ex, job: CopyJob, digest: str) -> list:
+        if ex is None:
+            # Pool already torn down by a cancel
+            self._cancelled_jobs += 1
+            return []
+        index = self.dedup_index
+        target = index.targets.get((job.size, digest))
+        if target is not None:
+            return [ex.submit(link_file_job, LinkJob(job, target, self.dedup, digest))]
+        if index.inflight_sizes[job.size]:
+            index.waiting.setdefault(job.size, []).append((job, digest))
+            return []
+        index.add_primary(job)
+        return [ex.submit(copy_hashed_job, job)]
+
+    def _dedup_primary_done(self, res: CopyResult) -> list:
+        size, waiting = self.dedup_index.primary_done(res)
+        futures = []
+        for job, digest in waiting:
+            futures += self._dedup_place(self._ex, job, digest)
+        return futures
+
+    def _flush_batch(self, ex) -> list:
+        if not self._batch:
+            return []
+        batch, self._batch, self._batch_size = self._batch, [], 0
+        return [ex.submit(copy_batch_job, batch)]
+
+    def _submit_large(self, ex, job: CopyJob) -> list:
+        # The parent decides skip/sync and preallocates; workers only move bytes
+        dst_path = Path(job.dst)
+        part_path = job.dst + PART_SUFFIX
+        rel = self._rel(job.dst)
+        try:
+            st = os.stat(job.src)
+            if job.sync:
+                # Hashing a huge file costs about as much as recopying it
+                unchanged, digest = _sync_check(job, st, dst_path, allow_hash=False)
+                if unchanged:
+                    self._handle_result(CopyResult(True, job.src, job.dst, skipped=True,
+                                                   size=st.st_size, mtime_ns=st.st_mtime_ns,
+                                                   digest=digest))
+                    return []
+            elif not job.overwrite and dst_path.exists() and rel not in self.journal.ranges:
+                self._handle_result(CopyResult(True, job.src, job.dst, skipped=True))
+                return []
+
+            ranges = split_ranges(st.st_size, self.chunk_size)
+            finished = self.journal.ranges.get(rel)
+            if finished and os.path.exists(part_path) and os.stat(part_path).st_size == st.st_size:
+                # Resuming: only the ranges the journal hasn't seen complete
+                ranges = [r for r in ranges if r not in finished]
+            else:
+                with open(part_path, "wb") as f:
+                    f.truncate(st.st_size)
+        except OSError as e:
+            self._handle_result(CopyResult(False, job.src, job.dst, str(e)))
+            return []
+
+        lf = _LargeFile(job, st, rel, len(ranges))
+        self.lanes["large"].begin()
+        if not ranges:
+            self._finish_large(lf)
+            return []
+
+        self._large[part_path] = lf
+        return [ex.submit(copy_range_job, RangeJob(job.src, part_path, off, n, self.verify))
+                for off, n in ranges]
+
+    def _on_done(self, fut) -> list:
+        """Account for one finished future; returns any follow-up futures."""
+        res = fut.result()
+        if isinstance(res, list):
+            for r in res:
+                self.stats.worker_time(r.worker, r.elapsed)
+                self._handle_result(r)
+            return []
+
+        self.stats.worker_time(res.worker, res.elapsed)
+        if isinstance(res, ShardResult):
+            self._handle_shard(res)
+            return []
+        if isinstance(res, DeleteResult):
+            self._handle_delete(res)
+            return []
+        if isinstance(res, MetaResult):
+            self._handle_meta(res)
+            return []
+        if isinstance(res, RangeResult):
+            self._handle_range(res)
+            return []
+        if isinstance(res, HashResult):
+            if not res.ok:
+                self._handle_result(CopyResult(False, res.job.src, res.job.dst, res.error,
+                                               errno=res.errno))
+                return []
+            return self._dedup_place(self._ex, res.job, res.digest)
+
+        self._handle_result(res)
+        if self.dedup_index is not None and res.dst in self.dedup_index.inflight:
+            return self._dedup_primary_done(res)
+        return []
+
+    def _flush_meta(self, ex, final: bool = False) -> list:
+        if not self._meta_pending or (len(self._meta_pending) < META_BATCH_FILES and not final):
+            return []
+        items, self._meta_pending = self._meta_pending, []
+        return [ex.submit(apply_metadata_job, MetaBatch(items, self.metadata))]
+
+    def _handle_meta(self, res: MetaResult):
+        self._meta_errors += len(res.errors)
+        self._errors += len(res.errors)
+        for dst in res.applied:
+            record = self._meta_records.pop(dst, None)
+            if record is not None:
+                self._record_done(*record)
+        for dst, error, _ in res.errors:
+            # Never journaled: a resume or the next sync copies it again
+            self._meta_records.pop(dst, None)
+            self.ui.log(f"שגיאה במטא-דאטה: {dst}: {error}")
+
+    def _settle_meta(self):
+        # A cancel drops queued metadata batches. Apply what they held here, so a
+        # rerun that skips existing files doesn't keep them with the wrong times/mode
+        if not self._meta_records:
+            return
+        items = [(record[1].src, dst) for dst, record in self._meta_records.items()]
+        self._meta_pending = []
+        self._handle_meta(_apply_metadata_batch(MetaBatch(items, self.metadata)))
+
+    def _restore_dirs(self):
+        if self._cancel or not self._dirs:
+            return
+        errors = restore_dir_metadata(self._dirs.values(), self.metadata)
+        self._handle_meta(MetaResult(len(self._dirs) - len(errors), errors))
+        self.ui.log(f"מטא-דאטה ({self.metadata}) שוחזרה ל-{len(self._dirs) - len(errors)} תיקיות.")
+
+    def _handle_delete(self, res: DeleteResult):
+        if res.ok:
+            self._deleted += 1
+        elif res.errno != errno.ECANCELED:
+            self._errors += 1
+            self.ui.log(f"שגיאה במחיקה: {res.path}: {res.error}")
+
+    def _handle_range(self, res: RangeResult):
+        lf = self._large[res.dst]
+        lf.pending -= 1
+        if res.errno == errno.ECANCELED:
+            # Left in self._large: reported as partial, resumable from the journal
+            lf.cancelled = True
+            return
+        if res.digest is not None:
+            lf.digests.append([res.offset, res.length, res.digest])
+        if res.verified is False:
+            lf.mismatch = True
+        if res.ok:
+            self.journal.range_done(lf.rel, res.offset, res.length)
+        elif lf.error is None:
+            lf.error = f"bytes {res.offset}+{res.length}: {res.error}"
+            lf.errno = res.errno
+        if lf.pending or lf.cancelled:
+            return
+
+        del self._large[res.dst]
+        self._finish_large(lf)
+
+    def _finish_large(self, lf: _LargeFile):
+        job, st = lf.job, lf.st
+        if lf.error is None:
+            try:
+                os.replace(job.dst + PART_SUFFIX, job.dst)
+            except OSError as e:
+                lf.error, lf.errno = str(e), e.errno
+        verified = None
+        if self.verify != "off":
+            verified = not lf.mismatch
+            # Ranges finished by an earlier (resumed) run have no digest here
+            if lf.error is None and sum(r[1] for r in lf.digests) == st.st_size:
+                self.checksums.record(lf.rel, sorted(lf.digests))
+
+        self._handle_result(CopyResult(lf.error is None, job.src, job.dst, lf.error,
+                                       size=st.st_size, mtime_ns=st.st_mtime_ns,
+                                       errno=lf.errno, elapsed=time.perf_counter() - lf.started,
+                                       verified=verified),
+                            lane="large")
+
+    def _handle_result(self, res: CopyResult, lane: str = "small", journal: bool = True):
+        if res.errno == errno.ECANCELED:
+            self._cancelled_jobs += 1
+            return
+
+        if not res.ok:
+            self._errors += 1
+            self.ui.log(f"שגיאה: {res.src} → {res.dst}: {res.error}")
+        elif res.skipped:
+            self._skipped += 1
+        elif res.linked:
+            self.lanes[lane].add(0)
+            self.dedup_index.linked[res.linked] += 1
+            self.dedup_index.bytes_saved += res.size
+        else:
+            self.lanes[lane].add(res.size)
+
+        deferred = (res.ok and not res.skipped and res.linked != "hardlink"
+                    and self.metadata != "data")
+        if deferred:
+            # Hardlinks share the first copy's inode, metadata included
+            self._meta_pending.append((res.src, res.dst))
+
+        if res.verified is True:
+            self._verified += 1
+        elif res.verified is False:
+            self._verify_failed += 1
+
+        if self.tuner is not None:
+            self.tuner.observe(res.size if res.ok and not res.skipped else 0)
+
+        if deferred:
+            # The file only counts as done for resume and sync once its metadata is in place
+            self._meta_records[res.dst] = (self._rel(res.dst), res, journal)
+        if res.ok and (journal or self.manifest is not None or self.checksums is not None):
+            rel = self._rel(res.dst)
+            if not deferred:
+                self._record_done(rel, res, journal)
+            if self.checksums is not None:
+                if res.skipped:
+                    self.checksums.carry(rel)
+                elif res.digest is not None:
+                    self.checksums.record(rel, res.digest)
+
+        self._copied += 1
+        self.stats.file_done(res, res.elapsed)
+        self.ui.progress(self._copied, self._total)
+
+    def _record_done(self, rel: str, res: CopyResult, journal: bool):
+        if journal:
+            self.journal.file_done(rel)
+        if self.manifest is not None:
+            self.manifest.record(rel, res.size, res.mtime_ns, res.digest)
+
+        now = time.monotonic()
+        if now - self._last_stats >= STATS_INTERVAL:
+            self._last_stats = now
+            self.ui.stats(self.stats.snapshot(self._total))
+
+    def _finish_summary(self) -> bool:
+        if self.mirror:
+            c = self.mirror_counts
+            self.ui.log(f"מראה: {c['copy']} חדשים, {c['update']} עודכנו, "
+                        f"{self._deleted} נמחקו, {c['rename']} שונו שם, {c['same']} ללא שינוי.")
+
+        if self._cancel:
+            self.ui.log(f"בוטל: {self._copied} קבצים טופלו, "
+                        f"{self._discovered - self._copied} מתוך {self._discovered} שנסרקו לא הועתקו"
+                        + (f", {len(self._large)} קבצים גדולים הועתקו חלקית." if self._large else "."))
+            return False
+
+        if self.sync:
+            self.ui.log(f"סנכרון: {self._copied - self._skipped - self._errors} הועתקו, "
+                        f"{self._skipped} ללא שינוי.")
+
+        if self.dedup_index is not None:
+            index = self.dedup_index
+            self.ui.log(f"כפילויות: {sum(index.linked.values())} קבצים קושרו "
+                        f"(reflink {index.linked['reflink']}, hardlink {index.linked['hardlink']}), "
+                        f"נחסכו {index.bytes_saved / (1024 * 1024):.1f} MB.")
+
+        if self.verify != "off":
+            self.ui.log(f"אימות: {self._verified} קבצים אומתו, {self._verify_failed} לא תאמו.")
+
+        if self.lanes["large"].files:
+            self.ui.log("קבצים קטנים: " + self.lanes["small"].summary())
+            self.ui.log("קבצים גדולים: " + self.lanes["large"].summary())
+
+        if self._errors:
+            self.ui.log(f"סיום עם {self._errors} שגיאות.")
+            return False
+
+        self.ui.log("הסתיים בהצלחה.")
+        return True
+
+    def _inflight_limit(self) -> int:
+        return self.tuner.active if self.tuner is not None else self.window
+
+    def _autotune(self):
+        if self.tuner is None:
+            return
+        change = self.tuner.tick()
+        if change:
+            old, new, score = change
+            self.ui.log(f"כוונון עובדים: {old} → {new} "
+                        f"({score / (1024 * 1024):.1f} MB/s משוקלל)")
+
+    def _reap(self, inflight: set) -> set:
+        # The timeout keeps a cancel from waiting on the next completion
+        done, inflight = wait(inflight, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+        for f in done:
+            inflight.update(self._on_done(f))
+        if self._ex is not None:
+            inflight.update(self._flush_meta(self._ex))
+        return inflight
+
+    def _abort(self, ex, inflight: set):
+        """Drop queued futures, give running ones CANCEL_GRACE to stop at a chunk boundary."""
+        self._cancel_event.set()
+        dropped = sum(1 for f in inflight if f.cancel())
+        running = {f for f in inflight if not f.cancelled()}
+
+        done, stuck = wait(running, timeout=CANCEL_GRACE)
+        for f in done:
+            self._on_done(f)
+
+        if stuck and self.mode in ("processes", "sharded"):
+            # Someone is inside one long syscall: don't wait for it
+            for proc in list((getattr(ex, "_processes", None) or {}).values()):
+                proc.terminate()
+        ex.shutdown(wait=not stuck, cancel_futures=True)
+        self.ui.log(f"ביטול: {dropped} משימות בתור בוטלו, {len(done)} משימות רצות נעצרו"
+                    + (f", {len(stuck)} לא הגיבו." if stuck else "."))
+
+    def _execute_streaming(self, jobs_iter: Iterable[CopyJob]):
+        inflight = set()
+
+        ex = self._get_executor()
+        self._ex = ex
+        try:
+            for job in jobs_iter:
+                if self._cancel:
+                    break
+
+                inflight.update(self._submit(ex, job))
+
+                # Backpressure: stop walking until a slot frees up
+                while len(inflight) >= self._inflight_limit() and not self._cancel:
+                    inflight = self._reap(inflight)
+                    self._autotune()
+
+            if not self._cancel:
+                inflight.update(self._flush_batch(ex))
+            # Drain; finished futures may still queue follow-ups (dedup links,
+            # metadata batches), the last metadata batch once everything else is done
+            while not self._cancel:
+                inflight.update(self._flush_meta(ex, final=not inflight))
+                if not inflight:
+                    break
+                inflight = self._reap(inflight)
+        finally:
+            self._ex = None
+            if self._cancel:
+                self._abort(ex, inflight)
+            else:
+                ex.shutdown(wait=True)
+
+        self._settle_meta()
+        self._restore_dirs()
+        return self._finish_summary()
+
+
+# =========================== UI EVENTS ===========================
+
+class UIEventChannel:
+    """
+    Thread-safe stand-in for the UI that the worker talks to. Progress calls
+    only overwrite the latest value, log lines go into a ring buffer, and the
+    Tk thread collects everything in one drain() per poll.
+    """
+
+    def __init__(self, log_limit: int = LOG_RING_SIZE):
+        self._lock = threading.Lock()
+        self._logs: deque = deque(maxlen=log_limit)
+        self._dropped = 0
+        self._progress: Optional[Tuple[int, int]] = None
+        self._stats: Optional[dict] = None
+        self._events: list = []
+
+    def log(self, text: str):
+        with self._lock:
+            if len(self._logs) == self._logs.maxlen:
+                self._dropped += 1
+            self._logs.append(text)
+
+    def progress(self, copied: int, total: int):
+        self._progress = (copied, total)
+
+    def stats(self, snapshot: dict):
+        self._stats = snapshot
+
+    def total_known(self, total: int):
+        with self._lock:
+            self._events.append(("total_known", total))
+
+    def plan(self, action: str, path: str):
+        self.log(f"{PLAN_MARKS[action]} {path}")
+
+    def fatal(self, msg: str):
+        with self._lock:
+            self._events.append(("fatal", msg))
+
+    def finished(self, success: bool):
+        with self._lock:
+            self._events.append(("finished", success))
+
+    def drain(self):
+        with self._lock:
+            logs, self._logs = list(self._logs), deque(maxlen=self._logs.maxlen)
+            dropped, self._dropped = self._dropped, 0
+            events, self._events = self._events, []
+            progress, self._progress = self._progress, None
+            stats, self._stats = self._stats, None
+        return logs, dropped, progress, stats, events
@@ -1,204 +1,21 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os
-import sys
-import shutil
 import threading
 import multiprocessing
 from pathlib import Path
-from dataclasses import dataclass
-from typing import Optional, Tuple, Iterable, List
-
-from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from typing import Optional
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 
-EXCLUDED_DIR_NAME = "node_modules"
-
-# =========================== COPY JOB ===========================
-
-@dataclass
-class CopyJob:
-    src: str
-    dst: str
-    overwrite: bool
-
-def copy_file_job(job: CopyJob) -> Tuple[bool, str, str, Optional[str]]:
-    try:
-        src_path = Path(job.src)
-        dst_path = Path(job.dst)
-
-        if dst_path.exists() and not job.overwrite:
-            return True, job.src, job.dst, None
-
-        if src_path.is_symlink():
-            try:
-                real = src_path.resolve(strict=True)
-                if real.is_file():
-                    shutil.copy2(real, dst_path)
-                return True, job.src, job.dst, None
-            except Exception as e:
-                return False, job.src, job.dst, f"symlink error: {e}"
-
-        shutil.copy2(src_path, dst_path)
-        return True, job.src, job.dst, None
-
-    except Exception as e:
-        return False, job.src, job.dst, str(e)
-
-
-# =========================== WORKER ===========================
-
-class FastCopyWorker:
-    def __init__(self, src: Path, dst: Path, overwrite: bool, mode: str,
-                 workers: int, quick_mode: bool, ui_callback):
-        self.src = src
-        self.dst = dst
-        self.overwrite = overwrite
-        self.mode = mode
-        self.workers = max(1, workers)
-        self.quick_mode = quick_mode
-        self._cancel = False
-        self.ui = ui_callback
-
-    def cancel(self):
-        self._cancel = True
-
-    def start(self):
-        try:
-            if not self.src.exists():
-                self.ui.fatal("תיקיית המקור לא קיימת.")
-                self.ui.finished(False)
-                return
-
-            if not self.src.is_dir():
-                self.ui.fatal("המקור אינו תיקייה.")
-                self.ui.finished(False)
-                return
-
-            if str(self.dst.resolve()).startswith(str(self.src.resolve()) + os.sep):
-                self.ui.fatal("תיקיית היעד בתוך תיקיית המקור.")
-                self.ui.finished(False)
-                return
-
-            self.dst.mkdir(parents=True, exist_ok=True)
-
-            # QUICK
-            if self.quick_mode:
-                self.ui.log("מצב מהיר: מתחיל ללא ספירה מוקדמת.")
-                jobs_iter = self._collect_jobs(self.src, self.dst)
-                success = self._execute_streaming(jobs_iter)
-                self.ui.finished(success)
-                return
-
-            # ACCURATE
-            self.ui.log("מצב מדויק: סופר קבצים…")
-            jobs = list(self._collect_jobs(self.src, self.dst))
-            total = len(jobs)
-            self.ui.total_known(total)
-            self.ui.log(f"נמצאו {total} קבצים.")
-
-            success = self._execute_jobs(jobs, total)
-            self.ui.finished(success)
-
-        except Exception as e:
-            self.ui.fatal(f"שגיאה: {e}")
-            self.ui.finished(False)
-
-    def _collect_jobs(self, src: Path, dst: Path) -> Iterable[CopyJob]:
-        for root, dirs, files in os.walk(src, topdown=True, followlinks=False):
-            if self._cancel:
-                break
-
-            # Skip node_modules
-            dirs[:] = [d for d in dirs if d != EXCLUDED_DIR_NAME]
-
-            root_path = Path(root)
-            rel = root_path.relative_to(src)
-            target_dir = dst / rel
-            target_dir.mkdir(parents=True, exist_ok=True)
-
-            for f in files:
-                if self._cancel:
-                    break
-                yield CopyJob(str(root_path / f), str(target_dir / f), self.overwrite)
-
-    def _get_executor(self):
-        if self.mode == "processes":
-            return ProcessPoolExecutor(
-                max_workers=self.workers,
-                mp_context=multiprocessing.get_context("spawn")
-            )
-        return ThreadPoolExecutor(max_workers=self.workers)
-
-    def _execute_jobs(self, jobs: List[CopyJob], total: int):
-        copied = 0
-        errors = 0
-
-        with self._get_executor() as ex:
-            futures = [ex.submit(copy_file_job, job) for job in jobs]
-
-            for fut in as_completed(futures):
-                if self._cancel:
-                    self.ui.log("בוטל על ידי המשתמש.")
-                    return False
-
-                ok, s, d, err = fut.result()
-
-                if not ok:
-                    errors += 1
-                    self.ui.log(f"שגיאה: {s} → {d}: {err}")
-
-                copied += 1
-                self.ui.progress(copied, total)
-
-        if errors:
-            self.ui.log(f"סיום עם {errors} שגיאות.")
-            return False
-
-        self.ui.log("הסתיים בהצלחה.")
-        return True
-
-    def _execute_streaming(self, jobs_iter: Iterable[CopyJob]):
-        copied = 0
-        errors = 0
-        inflight = set()
-
-        with self._get_executor() as ex:
-            for job in jobs_iter:
-                if self._cancel:
-                    break
-
-                fut = ex.submit(copy_file_job, job)
-                inflight.add(fut)
-
-                done = [f for f in inflight if f.done()]
-                for f in done:
-                    inflight.remove(f)
-                    ok, s, d, err = f.result()
-                    if not ok:
-                        errors += 1
-                        self.ui.log(f"שגיאה: {s} → {d}: {err}")
-
-                    copied += 1
-                    self.ui.progress(copied, 0)
-
-            for f in as_completed(inflight):
-                ok, s, d, err = f.result()
-                if not ok:
-                    errors += 1
-                copied += 1
-                self.ui.progress(copied, 0)
-
-        if errors:
-            self.ui.log(f"סיום עם {errors} שגיאות.")
-            return False
-
-        self.ui.log("הסתיים בהצלחה.")
-        return True
+from folder_copier_engine import (FastCopyWorker, UIEventChannel, AUTOTUNE_MAX_WORKERS,
+                                  MODES, DEDUP_MODES, VERIFY_MODES, SCHEDULES,
+                                  METADATA_POLICIES)
 
+# Worker → Tk: the UI drains queued events UI_POLL_HZ times a second
+UI_POLL_HZ = 10
+LOG_MAX_LINES = 5000
 
 # =========================== UI ===========================
 
@@ -226,19 +43,51 @@ class TkUI:
         # Options
         self.overwrite_var = tk.BooleanVar()
         self.quick_var = tk.BooleanVar(value=True)
+        self.sync_var = tk.BooleanVar()
+        self.hash_var = tk.BooleanVar()
+        self.resume_var = tk.BooleanVar()
+        self.mirror_var = tk.BooleanVar()
+        self.dry_run_var = tk.BooleanVar()
 
         ttk.Checkbutton(frm, text="Overwrite", variable=self.overwrite_var).grid(row=2, column=0, sticky="w")
         ttk.Checkbutton(frm, text="Quick Mode", variable=self.quick_var).grid(row=2, column=1, sticky="w")
+        ttk.Checkbutton(frm, text="Sync", variable=self.sync_var).grid(row=2, column=2, sticky="w")
+        ttk.Checkbutton(frm, text="Hash", variable=self.hash_var).grid(row=2, column=3, sticky="w")
+        ttk.Checkbutton(frm, text="Resume", variable=self.resume_var).grid(row=2, column=4, sticky="w")
+
+        self.dedup_cb = ttk.Combobox(frm, values=list(DEDUP_MODES), width=8, state="readonly")
+        self.dedup_cb.set("off")
+        self.dedup_cb.grid(row=2, column=5, sticky="w")
+
+        self.verify_cb = ttk.Combobox(frm, values=list(VERIFY_MODES), width=8, state="readonly")
+        self.verify_cb.set("off")
+        self.verify_cb.grid(row=2, column=6, sticky="w")
+
+        ttk.Checkbutton(frm, text="Mirror", variable=self.mirror_var).grid(row=2, column=7, sticky="w")
+        ttk.Checkbutton(frm, text="Dry run", variable=self.dry_run_var).grid(row=2, column=8, sticky="w")
 
         ttk.Label(frm, text="מוד:").grid(row=3, column=0, sticky="w")
-        self.mode_cb = ttk.Combobox(frm, values=["threads", "processes"], width=10)
+        self.mode_cb = ttk.Combobox(frm, values=list(MODES), width=10)
         self.mode_cb.set("threads")
         self.mode_cb.grid(row=3, column=1)
 
-        ttk.Label(frm, text="מס' עובדים:").grid(row=3, column=2, sticky="w")
-        self.workers_var = tk.IntVar(value=8)
+        ttk.Label(frm, text="מס' עובדים / auto:").grid(row=3, column=2, sticky="w")
+        self.workers_var = tk.StringVar(value="8")
         ttk.Entry(frm, textvariable=self.workers_var, width=5).grid(row=3, column=3)
 
+        ttk.Label(frm, text="חלון (0=אוטו'):").grid(row=3, column=4, sticky="w")
+        self.window_var = tk.IntVar(value=0)
+        ttk.Entry(frm, textvariable=self.window_var, width=5).grid(row=3, column=5)
+
+        self.schedule_cb = ttk.Combobox(frm, values=list(SCHEDULES), width=8, state="readonly")
+        self.schedule_cb.set("walk")
+        self.schedule_cb.grid(row=3, column=6, sticky="w")
+
+        self.metadata_cb = ttk.Combobox(frm, values=list(METADATA_POLICIES), width=8,
+                                        state="readonly")
+        self.metadata_cb.set("full")
+        self.metadata_cb.grid(row=3, column=7, sticky="w")
+
         # Progress
         self.prog_lbl = ttk.Label(frm, text="מוכן")
         self.prog_lbl.grid(row=4, column=0, sticky="w")
@@ -246,6 +95,9 @@ class TkUI:
         self.prog_bar = ttk.Progressbar(frm, length=400)
         self.prog_bar.grid(row=4, column=1, columnspan=3, sticky="we")
 
+        self.stats_lbl = ttk.Label(frm, text="")
+        self.stats_lbl.grid(row=4, column=4, columnspan=2, sticky="w")
+
         # Buttons
         ttk.Button(frm, text="התחל", command=self.start_copy).grid(row=5, column=1)
         self.cancel_btn = ttk.Button(frm, text="בטל", command=self.cancel_copy, state="disabled")
@@ -260,11 +112,35 @@ class TkUI:
 
         self.worker = None
         self.thread = None
+        self.channel: Optional[UIEventChannel] = None
+
+    # ======== Worker events, applied on the Tk thread ========
+
+    def _poll_events(self):
+        channel = self.channel
+        if channel is None:
+            return
 
-    # ======== Worker callbacks: no name conflicts ========
+        logs, dropped, progress, stats, events = channel.drain()
+        if dropped:
+            logs.insert(0, f"… {dropped} שורות לוג הושמטו")
+        if logs:
+            self.log("\n".join(logs))
+        if progress is not None:
+            self.progress(*progress)
+        if stats is not None:
+            self.stats(stats)
+
+        for name, arg in events:
+            getattr(self, name)(arg)
+
+        if self.channel is channel:
+            self.root.after(1000 // UI_POLL_HZ, self._poll_events)
 
     def log(self, text: str):
         self.log_box.insert("end", text + "\n")
+        # Keep the widget bounded, however long the run
+        self.log_box.delete("1.0", f"end-{LOG_MAX_LINES}l")
         self.log_box.see("end")
 
     def fatal(self, msg: str):
@@ -283,9 +159,18 @@ class TkUI:
             self.prog_bar.configure(mode="determinate", maximum=total, value=copied)
             self.prog_lbl.config(text=f"{copied}/{total}")
 
+    def stats(self, snapshot: dict):
+        text = (f"{snapshot['bytes_per_s'] / (1024 * 1024):.1f} MB/s · "
+                f"{snapshot['files_per_s']:.0f} קבצים/ש'")
+        eta = snapshot.get("eta_s")
+        if eta is not None:
+            text += f" · ETA {int(eta) // 60:02d}:{int(eta) % 60:02d}"
+        self.stats_lbl.config(text=text)
+
     def finished(self, success: bool):
         self.cancel_btn.configure(state="disabled")
         self.thread = None
+        self.channel = None
 
         if success:
             self.prog_lbl.config(text="הסתיים בהצלחה")
@@ -319,16 +204,31 @@ class TkUI:
         self.log_box.delete("1.0", "end")
 
         mode = self.mode_cb.get()
-        workers = int(self.workers_var.get())
+        workers_text = self.workers_var.get().strip().lower()
+        auto_workers = workers_text == "auto"
+        workers = AUTOTUNE_MAX_WORKERS if auto_workers else int(workers_text)
         quick = self.quick_var.get()
 
+        self.channel = UIEventChannel()
         self.worker = FastCopyWorker(src, dst, self.overwrite_var.get(),
-                                     mode, workers, quick, self)
+                                     mode, workers, quick, self.channel,
+                                     sync=self.sync_var.get(),
+                                     check_hash=self.hash_var.get(),
+                                     window=int(self.window_var.get()),
+                                     resume=self.resume_var.get(),
+                                     auto_workers=auto_workers,
+                                     dedup=self.dedup_cb.get(),
+                                     verify=self.verify_cb.get(),
+                                     schedule=self.schedule_cb.get(),
+                                     mirror=self.mirror_var.get(),
+                                     dry_run=self.mirror_var.get() and self.dry_run_var.get(),
+                                     metadata=self.metadata_cb.get())
 
         self.thread = threading.Thread(target=self.worker.start, daemon=True)
         self.thread.start()
 
         self.cancel_btn.configure(state="normal")
+        self.root.after(1000 // UI_POLL_HZ, self._poll_events)
 
     def cancel_copy(self):
         if self.worker:
@@ -1,12 +1,59 @@
 import os
+import sys
+import time
+import zlib
 import shutil
+import struct
 import zipfile
-import tkinter as tk
-from tkinter import filedialog, messagebox
+import functools
+import contextlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # רשימת תיקיות שיש לדלג עליהן
 SKIP_DIRS = {"node_modules", ".git", "__pycache__"}
 
+# מעבר יחיד: סינון בזמן הסריקה וכתיבה ישירה ל-ZIP, בלי עותק זמני
+SINGLE_PASS = True
+
+# דחיסה מקבילית: zlib משחרר את ה-GIL, כך ש-threads מנצלים את כל הליבות
+COMPRESS_WORKERS = os.cpu_count() or 4
+COMPRESS_LEVEL = 6
+READ_CHUNK = 1024 * 1024
+INLINE_MIN = 4 * 1024 * 1024            # קבצים גדולים מזה נדחסים בבלוקים ונכתבים ישירות לפלט
+BLOCK_SIZE = 1024 * 1024                # גודל בלוק דחיסה עצמאי בקובץ גדול (כמו pigz)
+MAX_INFLIGHT_BYTES = 256 * 1024 * 1024  # תקרת הזיכרון של קבצים שנדחסים במקביל
+
+# מדיניות דחיסה לפי סוג וגודל הקובץ
+STORED_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".heic", ".ico",
+    ".woff", ".woff2", ".mp3", ".m4a", ".ogg", ".flac", ".aac", ".opus",
+    ".mp4", ".mkv", ".mov", ".avi", ".webm",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".zst", ".7z", ".rar",
+    ".jar", ".whl", ".apk", ".docx", ".xlsx", ".pptx", ".odt", ".epub",
+}
+TEXT_EXTENSIONS = {
+    ".txt", ".md", ".csv", ".json", ".xml", ".html", ".htm", ".css", ".js", ".jsx",
+    ".ts", ".tsx", ".py", ".java", ".c", ".h", ".cpp", ".cs", ".go", ".rs", ".sql",
+    ".svg", ".yml", ".yaml", ".ini", ".log",
+}
+SMALL_FILE = 64 * 1024             # קבצים קטנים: רמה גבוהה כמעט בחינם
+LARGE_FILE = 64 * 1024 * 1024      # קבצים ענקיים: רמה נמוכה ומהירה
+LEVEL_SMALL = 9
+LEVEL_TEXT = 9
+LEVEL_LARGE = 1
+PROBE = True                       # דחיסת ניסיון של הבלוק הראשון בסוגים לא מוכרים
+PROBE_SIZE = 64 * 1024
+PROBE_MAX_RATIO = 0.95             # מעל יחס זה הקובץ נשמר בלי דחיסה
+
+# עדכון מצטבר: אם קובץ ה-ZIP כבר קיים, רשומות שלא השתנו מועתקות ממנו בלי דחיסה מחדש
+UPDATE_EXISTING = True
+UPDATE_CHECK_CRC = True            # בנוסף לגודל ול-mtime, מוודא גם CRC (קריאה בלבד, בלי דחיסה)
+
+ZIP64_LIMIT = 0xFFFFFFFF
+ZIP_FLAG_UTF8 = 0x800
+ZIP_FLAG_DESCRIPTOR = 0x08
+
 def copy_filtered_directory(src, dst):
     """
     מעתיק תיקייה כולל מבנה, תוך דילוג על תיקיות מסוימות לפי שם.
@@ -29,6 +76,550 @@ def copy_filtered_directory(src, dst):
             except Exception as e:
                 print(f"❌ שגיאה בהעתקה של {src_file}: {e}")
 
+def iter_filtered_files(src, exclude=()):
+    """
+    מחזיר (נתיב מלא, נתיב יחסי) לכל קובץ בתיקייה, תוך דילוג על SKIP_DIRS.
+    """
+    exclude = {os.path.abspath(p) for p in exclude}
+    for root, dirs, files in os.walk(src):
+        # סדר קבוע, כדי שאותו מקור ייתן את אותו ZIP
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        for file in sorted(files):
+            abs_path = os.path.join(root, file)
+            # לא לדחוס את קובץ ה-ZIP לתוך עצמו אם הוא נשמר בתוך המקור
+            if exclude and os.path.abspath(abs_path) in exclude:
+                continue
+            yield abs_path, os.path.relpath(abs_path, src)
+
+def _probe_ratio(abs_path):
+    with open(abs_path, "rb") as f:
+        block = f.read(PROBE_SIZE)
+    if not block:
+        return 1.0
+    return len(zlib.compress(block, 1)) / len(block)
+
+def choose_compression(abs_path, size, level=None):
+    """
+    בוחר שיטת דחיסה לקובץ: (method, level, policy).
+    level קבוע עוקף את המדיניות.
+    """
+    if level is not None:
+        return zipfile.ZIP_DEFLATED, level, f"deflate:{level}"
+    ext = os.path.splitext(abs_path)[1].lower()
+    if ext in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED, 0, "store:type"
+    if size >= LARGE_FILE:
+        level = LEVEL_LARGE
+    elif ext in TEXT_EXTENSIONS or size <= SMALL_FILE:
+        level = LEVEL_TEXT if ext in TEXT_EXTENSIONS else LEVEL_SMALL
+    else:
+        if PROBE and _probe_ratio(abs_path) > PROBE_MAX_RATIO:
+            return zipfile.ZIP_STORED, 0, "store:probe"
+        level = COMPRESS_LEVEL
+    return zipfile.ZIP_DEFLATED, level, f"deflate:{level}"
+
+def _fmt_size(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+class PolicyReport:
+    """
+    סיכום מדיניות הדחיסה: קבצים ובתים לפני/אחרי לכל החלטה.
+    """
+
+    def __init__(self):
+        self.rows = {}
+
+    def add(self, policy, size, csize):
+        row = self.rows.setdefault(policy, [0, 0, 0])
+        row[0] += 1
+        row[1] += size
+        row[2] += csize
+
+    def print(self):
+        if not self.rows:
+            return
+        print("\n📊 מדיניות דחיסה:")
+        total_in = total_out = 0
+        for policy, (files, size, csize) in sorted(self.rows.items()):
+            print(f"   {policy:<22} {files:>7} קבצים  {_fmt_size(size):>10} → {_fmt_size(csize):>10}")
+            total_in += size
+            total_out += csize
+        print(f"   נחסכו {_fmt_size(total_in - total_out)} מתוך {_fmt_size(total_in)}")
+
+def zip_filtered_directory(src, zip_path, level=None):
+    """
+    יוצר קובץ ZIP ישירות מתיקיית המקור במעבר אחד, תוך דילוג על SKIP_DIRS.
+    """
+    report = PolicyReport()
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for abs_path, rel_path in iter_filtered_files(src, exclude=(zip_path,)):
+            try:
+                method, lvl, policy = choose_compression(abs_path, os.path.getsize(abs_path), level)
+                zf.write(abs_path, arcname=rel_path, compress_type=method, compresslevel=lvl)
+            except OSError as e:
+                print(f"❌ שגיאה בדחיסה של {abs_path}: {e}")
+                continue
+            info = zf.filelist[-1]
+            report.add(policy, info.file_size, info.compress_size)
+    return report
+
+def _zip_date_time(mtime):
+    t = time.localtime(mtime)
+    if t.tm_year < 1980:
+        return 1980, 1, 1, 0, 0, 0
+    return t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour, t.tm_min, t.tm_sec // 2 * 2
+
+def _dos_time(mtime):
+    year, month, day, hour, minute, second = _zip_date_time(mtime)
+    return ((hour << 11) | (minute << 5) | (second // 2),
+            ((year - 1980) << 9) | (month << 5) | day)
+
+class Member:
+    """
+    רשומה אחת בארכיון: מטא-דאטה ונתונים דחוסים בזיכרון.
+    """
+    __slots__ = ("name", "method", "crc", "size", "csize", "mtime", "mode", "data",
+                 "policy", "flags", "offset", "large")
+
+    def __init__(self, name, method, crc, size, csize, mtime, mode, data=None, policy=""):
+        self.name = name
+        self.method = method
+        self.crc = crc
+        self.size = size
+        self.csize = csize
+        self.mtime = mtime
+        self.mode = mode
+        self.data = data
+        self.policy = policy
+        self.flags = ZIP_FLAG_UTF8
+        self.offset = 0
+        self.large = False              # ZIP64 הוכרז מראש בכותרת המקומית (רשומה זורמת)
+
+    @property
+    def zip64(self):
+        return self.large or self.size >= ZIP64_LIMIT or self.csize >= ZIP64_LIMIT
+
+class ZipWriter:
+    """
+    כותב ZIP סטנדרטי מרשומות שכבר נדחסו: כותרות מקומיות, ספרייה מרכזית ו-ZIP64 לפי הצורך.
+    סופר את הבתים בעצמו, כך שאינו צריך seek.
+    """
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.offset = 0
+        self.members = []
+
+    def _write(self, data):
+        self.fp.write(data)
+        self.offset += len(data)
+
+    def add(self, member, chunks):
+        name = member.name.encode("utf-8")
+        extra = b""
+        csize, size, version = member.csize, member.size, 20
+        if member.zip64:
+            extra = struct.pack("<HHQQ", 1, 16, size, csize)
+            csize = size = ZIP64_LIMIT
+            version = 45
+        dostime, dosdate = _dos_time(member.mtime)
+        member.offset = self.offset
+        self._write(struct.pack("<IHHHHHIIIHH", 0x04034b50, version, member.flags,
+                                member.method, dostime, dosdate, member.crc, csize, size,
+                                len(name), len(extra)))
+        self._write(name + extra)
+        for chunk in chunks:
+            self._write(chunk)
+        self.members.append(member)
+
+    def add_stream(self, member, chunks):
+        """
+        רשומה שגודלה וה-CRC שלה ידועים רק בסוף: הכותרת יוצאת עם אפסים,
+        והערכים האמיתיים נכתבים אחרי הנתונים ב-data descriptor.
+        chunks מעדכן את crc/size/csize של member תוך כדי.
+        """
+        name = member.name.encode("utf-8")
+        member.flags |= ZIP_FLAG_DESCRIPTOR
+        extra = b""
+        csize = size = 0
+        version = 20
+        if member.large:
+            extra = struct.pack("<HHQQ", 1, 16, 0, 0)
+            csize = size = ZIP64_LIMIT
+            version = 45
+        dostime, dosdate = _dos_time(member.mtime)
+        member.offset = self.offset
+        self._write(struct.pack("<IHHHHHIIIHH", 0x04034b50, version, member.flags,
+                                member.method, dostime, dosdate, 0, csize, size,
+                                len(name), len(extra)))
+        self._write(name + extra)
+        for chunk in chunks:
+            self._write(chunk)
+        if member.large:
+            self._write(struct.pack("<IIQQ", 0x08074b50, member.crc, member.csize, member.size))
+        elif member.zip64:
+            raise OSError(f"הקובץ גדל מעבר ל-4GB בזמן הדחיסה: {member.name}")
+        else:
+            self._write(struct.pack("<IIII", 0x08074b50, member.crc, member.csize, member.size))
+        self.members.append(member)
+
+    def close(self):
+        cd_offset = self.offset
+        for m in self.members:
+            name = m.name.encode("utf-8")
+            fields = []
+            csize, size, offset = m.csize, m.size, m.offset
+            if m.zip64:
+                fields += [m.size, m.csize]
+                csize = size = ZIP64_LIMIT
+            if m.offset >= ZIP64_LIMIT:
+                fields.append(m.offset)
+                offset = ZIP64_LIMIT
+            extra = struct.pack(f"<HH{len(fields)}Q", 1, 8 * len(fields), *fields) if fields else b""
+            version = 45 if fields else 20
+            dostime, dosdate = _dos_time(m.mtime)
+            self._write(struct.pack("<IHHHHHHIIIHHHHHII", 0x02014b50, (3 << 8) | version, version,
+                                    m.flags, m.method, dostime, dosdate, m.crc, csize, size,
+                                    len(name), len(extra), 0, 0, 0, (m.mode & 0xFFFF) << 16,
+                                    offset))
+            self._write(name + extra)
+        cd_size = self.offset - cd_offset
+        count = len(self.members)
+        if count > 0xFFFF or cd_offset >= ZIP64_LIMIT or cd_size >= ZIP64_LIMIT:
+            eocd64 = self.offset
+            self._write(struct.pack("<IQHHIIQQQQ", 0x06064b50, 44, (3 << 8) | 45, 45, 0, 0,
+                                    count, count, cd_size, cd_offset))
+            self._write(struct.pack("<IIQI", 0x07064b50, 0, eocd64, 1))
+        self._write(struct.pack("<IHHHHIIH", 0x06054b50, 0, 0, min(count, 0xFFFF),
+                                min(count, 0xFFFF), min(cd_size, ZIP64_LIMIT),
+                                min(cd_offset, ZIP64_LIMIT), 0))
+
+def _read_chunks(f):
+    while True:
+        chunk = f.read(READ_CHUNK)
+        if not chunk:
+            return
+        yield chunk
+
+def _file_crc(abs_path):
+    crc = size = 0
+    with open(abs_path, "rb") as f:
+        for chunk in _read_chunks(f):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+    return crc, size
+
+def _gf2_times(mat, vec):
+    total = 0
+    i = 0
+    while vec:
+        if vec & 1:
+            total ^= mat[i]
+        vec >>= 1
+        i += 1
+    return total
+
+def _gf2_compose(a, b):
+    return [_gf2_times(a, col) for col in b]
+
+@functools.lru_cache(maxsize=8)
+def _crc32_shift(length):
+    """
+    אופרטור GF(2) שמקדם CRC32 על פני length בתים של אפסים (כמו crc32_combine של zlib).
+    """
+    # ביט אפס אחד: הזזה ימינה עם הפולינום
+    op = [0xEDB88320] + [1 << n for n in range(31)]
+    for _ in range(3):
+        op = _gf2_compose(op, op)
+    result = [1 << n for n in range(32)]
+    while length:
+        if length & 1:
+            result = _gf2_compose(op, result)
+        op = _gf2_compose(op, op)
+        length >>= 1
+    return result
+
+def crc32_combine(crc1, crc2, len2):
+    """
+    CRC32 של A+B מתוך CRC32 של A, CRC32 של B ואורך B.
+    """
+    return _gf2_times(_crc32_shift(len2), crc1) ^ crc2
+
+def compress_block(abs_path, offset, level, last):
+    """
+    דוחס בלוק אחד של קובץ גדול ל-deflate גולמי עצמאי (רץ ב-worker): (crc, size, packed).
+    בלוק שאינו אחרון נסגר ב-Z_SYNC_FLUSH, כך שהבלוקים משורשרים לזרם deflate אחד.
+    בלי מילון מהבלוק הקודם: קובץ שמשתנה תוך כדי לא ישבור את הזרם.
+    """
+    with open(abs_path, "rb") as f:
+        f.seek(offset)
+        data = f.read(BLOCK_SIZE)
+    comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+    packed = comp.compress(data) + comp.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return zlib.crc32(data), len(data), packed
+
+def compress_member(abs_path, rel_path, level=None):
+    """
+    דוחס קובץ אחד (עד INLINE_MIN) ל-deflate גולמי ומחשב CRC32 וגדלים (רץ ב-worker).
+    הקובץ נקרא פעם אחת בלבד, כך שה-CRC תמיד מתאים לבתים שנכתבים לארכיון.
+    """
+    st = os.stat(abs_path)
+    name = rel_path.replace(os.sep, "/")
+    method, level, policy = choose_compression(abs_path, st.st_size, level)
+    with open(abs_path, "rb") as f:
+        data = f.read()
+    crc = zlib.crc32(data)
+    if method == zipfile.ZIP_DEFLATED:
+        comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+        packed = comp.compress(data) + comp.flush()
+        if len(packed) < len(data):
+            return Member(name, method, crc, len(data), len(packed), st.st_mtime, st.st_mode,
+                          packed, policy=policy)
+        # הדחיסה לא חסכה כלום
+        policy = "store:incompressible"
+    return Member(name, zipfile.ZIP_STORED, crc, len(data), len(data), st.st_mtime, st.st_mode,
+                  data, policy=policy)
+
+class PreviousArchive:
+    """
+    ה-ZIP הקודם בעדכון מצטבר: מאתר רשומות שלא השתנו ומעתיק את הבתים הדחוסים שלהן כמו שהם.
+    """
+
+    def __init__(self, path, check_crc=UPDATE_CHECK_CRC):
+        self.path = path
+        self.check_crc = check_crc
+        with zipfile.ZipFile(path) as zf:
+            self.infos = {i.filename: i for i in zf.infolist() if not i.is_dir()}
+        self.fp = open(path, "rb")
+
+    def close(self):
+        self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def match(self, abs_path, name, st):
+        """
+        Member שמצביע על הרשומה הקודמת אם הקובץ לא השתנה, אחרת None.
+        """
+        info = self.infos.get(name)
+        # רשומות מוצפנות לא נכנסות לעדכון
+        if info is None or info.flag_bits & 0x1 or info.file_size != st.st_size:
+            return None
+        if info.date_time != _zip_date_time(st.st_mtime):
+            return None
+        if self.check_crc and _file_crc(abs_path) != (info.CRC, info.file_size):
+            return None
+        return Member(name, info.compress_type, info.CRC, info.file_size, info.compress_size,
+                      st.st_mtime, st.st_mode, info, policy="reuse")
+
+    def raw_chunks(self, info):
+        self.fp.seek(info.header_offset)
+        header = self.fp.read(30)
+        if len(header) != 30 or header[:4] != b"PK\x03\x04":
+            raise zipfile.BadZipFile(f"כותרת פגומה בארכיון הקודם: {info.filename}")
+        name_len, extra_len = struct.unpack("<HH", header[26:30])
+        self.fp.seek(info.header_offset + 30 + name_len + extra_len)
+        remaining = info.compress_size
+        while remaining:
+            chunk = self.fp.read(min(READ_CHUNK, remaining))
+            if not chunk:
+                raise zipfile.BadZipFile(f"הארכיון הקודם קטוע: {info.filename}")
+            remaining -= len(chunk)
+            yield chunk
+
+def update_member(previous, abs_path, rel_path, level=None):
+    """
+    רשומה מהארכיון הקודם אם הקובץ לא השתנה, אחרת דחיסה רגילה (רץ ב-worker).
+    """
+    member = previous.match(abs_path, rel_path.replace(os.sep, "/"), os.stat(abs_path))
+    return member or compress_member(abs_path, rel_path, level)
+
+def _write_member(writer, member, previous=None):
+    if isinstance(member.data, zipfile.ZipInfo):
+        writer.add(member, previous.raw_chunks(member.data))
+        member.data = None
+        return
+    data, member.data = member.data, None
+    writer.add(member, (data,))
+
+def _stream_member(writer, abs_path, rel_path, level=None, ex=None, window=1):
+    """
+    דוחס קובץ גדול ישירות לפלט, בלי להחזיק אותו בזיכרון או בקובץ זמני:
+    זיכרון קבוע, CRC וגדלים ב-data descriptor.
+    עם ex, ה-workers דוחסים עד window בלוקים במקביל והכותב רק משרשר אותם לפי הסדר.
+    """
+    st = os.stat(abs_path)
+    method, level, policy = choose_compression(abs_path, st.st_size, level)
+    member = Member(rel_path.replace(os.sep, "/"), method, 0, 0, 0, st.st_mtime, st.st_mode,
+                    policy=policy)
+    # deflate עלול לנפח מעט נתונים שלא נדחסים, לכן מרווח ביטחון
+    member.large = st.st_size + st.st_size // 64 + 1024 >= ZIP64_LIMIT
+
+    if method == zipfile.ZIP_DEFLATED and ex is not None:
+        # הקובץ נקרא עד הגודל שנמדד עכשיו; בלוקים אחרי סוף קובץ שהתקצר יוצאים ריקים
+        offsets = range(0, st.st_size, BLOCK_SIZE)
+        jobs = iter(offsets)
+        blocks = deque()
+
+        def submit():
+            while len(blocks) < window:
+                offset = next(jobs, None)
+                if offset is None:
+                    return
+                blocks.append(ex.submit(compress_block, abs_path, offset, level,
+                                        offset == offsets[-1]))
+
+        submit()
+        # הבלוק הראשון לפני כתיבת הכותרת, כדי ששגיאת קריאה לא תשאיר רשומה חצויה
+        first = blocks.popleft().result()
+
+        def block_chunks():
+            result = first
+            try:
+                while True:
+                    crc, size, packed = result
+                    member.crc = crc32_combine(member.crc, crc, size)
+                    member.size += size
+                    member.csize += len(packed)
+                    yield packed
+                    submit()
+                    if not blocks:
+                        return
+                    result = blocks.popleft().result()
+            finally:
+                for fut in blocks:
+                    fut.cancel()
+
+        writer.add_stream(member, block_chunks())
+        return member
+
+    comp = zlib.compressobj(level, zlib.DEFLATED, -15) if method == zipfile.ZIP_DEFLATED else None
+
+    def chunks(f):
+        with f:
+            for chunk in _read_chunks(f):
+                member.crc = zlib.crc32(chunk, member.crc)
+                member.size += len(chunk)
+                out = comp.compress(chunk) if comp else chunk
+                member.csize += len(out)
+                if out:
+                    yield out
+        if comp:
+            tail = comp.flush()
+            member.csize += len(tail)
+            yield tail
+
+    # פותחים לפני כתיבת הכותרת, כדי ששגיאת קריאה לא תשאיר רשומה חצויה
+    writer.add_stream(member, chunks(open(abs_path, "rb")))
+    return member
+
+def write_archive(src, fp, workers=COMPRESS_WORKERS, level=None, previous=None, exclude=()):
+    """
+    כותב ZIP של src לקובץ פתוח fp: הקבצים נדחסים במקביל, וכותב יחיד מרכיב אותם לפי סדר הסריקה.
+    level=None מפעיל את מדיניות הדחיסה לפי סוג וגודל.
+    previous (PreviousArchive) מאפשר להעתיק רשומות שלא השתנו בלי לדחוס אותן מחדש.
+    קבצים מעל INLINE_MIN נדחסים במקביל בבלוקים של BLOCK_SIZE והכותב משרשר אותם ישירות
+    לפלט, כך שאין קבצים זמניים, והזיכרון חסום ב-MAX_INFLIGHT_BYTES.
+    """
+    report = PolicyReport()
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        writer = ZipWriter(fp)
+        pending = deque()
+        inflight = 0
+
+        def write_next():
+            nonlocal inflight
+            abs_path, rel_path, fut, cost = pending.popleft()
+            inflight -= cost
+            try:
+                if fut is not None:
+                    member = fut.result()
+                else:
+                    member = previous and previous.match(abs_path, rel_path.replace(os.sep, "/"),
+                                                         os.stat(abs_path))
+                    if not member:
+                        # התקציב שנשאר אחרי הקבצים הקטנים שכבר בדרך
+                        window = max(1, min(4 * workers,
+                                            (MAX_INFLIGHT_BYTES - inflight) // BLOCK_SIZE))
+                        member = _stream_member(writer, abs_path, rel_path, level, ex, window)
+                        report.add(member.policy, member.size, member.csize)
+                        return
+            except OSError as e:
+                print(f"❌ שגיאה בדחיסה של {abs_path}: {e}")
+                return
+            _write_member(writer, member, previous)
+            report.add(member.policy, member.size, member.csize)
+
+        for abs_path, rel_path in iter_filtered_files(src, exclude=exclude):
+            try:
+                size = os.path.getsize(abs_path)
+            except OSError:
+                size = 0
+            inline = size > INLINE_MIN
+            cost = 0 if inline else size
+            while pending and (inflight + cost > MAX_INFLIGHT_BYTES or len(pending) >= 4 * workers):
+                write_next()
+            if inline:
+                fut = None
+            elif previous:
+                fut = ex.submit(update_member, previous, abs_path, rel_path, level)
+            else:
+                fut = ex.submit(compress_member, abs_path, rel_path, level)
+            pending.append((abs_path, rel_path, fut, cost))
+            inflight += cost
+        while pending:
+            write_next()
+        writer.close()
+    return report
+
+def zip_parallel(src, zip_path, workers=COMPRESS_WORKERS, level=None, previous=None):
+    """
+    יוצר ZIP במעבר אחד לקובץ בדיסק (ראה write_archive).
+    """
+    exclude = (zip_path, previous.path) if previous else (zip_path,)
+    with open(zip_path, "wb") as fp:
+        return write_archive(src, fp, workers, level, previous, exclude)
+
+def zip_stream(src, fp=None, workers=COMPRESS_WORKERS, level=None):
+    """
+    כותב ZIP לזרם שאין בו seek (stdout, pipe ל-ssh/gpg, socket) בזיכרון קבוע:
+    קבצים גדולים נדחסים ישירות לפלט עם data descriptor ו-ZIP64 לפי הצורך.
+    """
+    fp = fp or sys.stdout.buffer
+    report = write_archive(src, fp, workers, level)
+    fp.flush()
+    return report
+
+def update_archive(src, zip_path, workers=COMPRESS_WORKERS, level=None):
+    """
+    מעדכן ZIP קיים: רשומות שלא השתנו (נתיב, גודל, mtime ו-CRC) מועתקות דחוסות כמו שהן,
+    ורק קבצים חדשים או ששונו נדחסים מחדש. הארכיון הישן מוחלף רק בסוף עבודה מוצלחת.
+    """
+    if not os.path.exists(zip_path):
+        return zip_parallel(src, zip_path, workers, level)
+    try:
+        previous = PreviousArchive(zip_path)
+    except (zipfile.BadZipFile, OSError) as e:
+        print(f"⚠️ הקובץ הקיים אינו ZIP תקין ({e}), נוצר ארכיון חדש במקומו")
+        return zip_parallel(src, zip_path, workers, level)
+    tmp_path = zip_path + ".tmp"
+    try:
+        with previous:
+            report = zip_parallel(src, tmp_path, workers, level, previous)
+        os.replace(tmp_path, zip_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return report
+
 def zip_directory(source_dir, zip_path):
     """
     יוצר קובץ ZIP תוך שמירה על מבנה תיקיות מלא.
@@ -40,7 +631,31 @@ def zip_directory(source_dir, zip_path):
                 rel_path = os.path.relpath(abs_path, source_dir)
                 zf.write(abs_path, arcname=rel_path)
 
+def stream_main(src_dir):
+    """
+    python gooZip.py SRC | ssh host 'cat > backup.zip'
+    ה-ZIP יוצא ל-stdout, וכל ההודעות מופנות ל-stderr.
+    """
+    out = sys.stdout.buffer
+    with contextlib.redirect_stdout(sys.stderr):
+        if out.isatty():
+            print("❌ הפלט הוא ZIP בינארי: יש להפנות אותו לקובץ או ל-pipe (python gooZip.py SRC > out.zip)")
+            return 2
+        if not os.path.isdir(src_dir):
+            print(f"❌ תיקייה לא קיימת: {src_dir}")
+            return 2
+        report = zip_stream(src_dir, out)
+        report.print()
+    return 0
+
 def main():
+    if len(sys.argv) > 1:
+        return stream_main(sys.argv[1])
+
+    # ממשק גרפי בלבד: מצב הזרמה רץ גם בלי tkinter (שרת, קונטיינר)
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+
     # בחירת תיקיית מקור
     root = tk.Tk()
     root.withdraw()
@@ -64,6 +679,19 @@ def main():
     print(f"\n📂 מקור: {src_dir}")
     print(f"📦 יעד ZIP: {zip_path}")
 
+    if SINGLE_PASS:
+        if UPDATE_EXISTING and os.path.exists(zip_path):
+            print("🔄 הארכיון קיים: עדכון מצטבר")
+            report = update_archive(src_dir, zip_path)
+        elif COMPRESS_WORKERS > 1:
+            report = zip_parallel(src_dir, zip_path)
+        else:
+            report = zip_filtered_directory(src_dir, zip_path)
+        report.print()
+        print(f"\n✅ קובץ ZIP נוצר בהצלחה בנתיב: {zip_path}")
+        messagebox.showinfo("הצלחה", f"הקובץ נוצר בהצלחה:\n{zip_path}")
+        return
+
     # יצירת תקייה זמנית להעתקה
     temp_copy_dir = os.path.join(os.path.dirname(zip_path), "_temp_filtered_copy")
     if os.path.exists(temp_copy_dir):
@@ -83,4 +711,4 @@ def main():
     messagebox.showinfo("הצלחה", f"הקובץ נוצר בהצלחה:\n{zip_path}")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())